@@ -1,26 +1,141 @@
 from src.Rag.agent.agent import graph, AgentState
-from langchain_core.messages import HumanMessage
+from src.monitoring.callbacks import metrics_handler
+from src.logger.message_summary import MessageSummary
+from src.Rag.agent.utils import get_clinical_llm, get_decision_llm, get_web_search
+from src.Rag.registry import registry
+from src.logger.logg import logs
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk
+from typing import Any, AsyncIterator, Dict, List, Tuple
+from weakref import WeakValueDictionary
+import asyncio
+import threading
 
-thread = {"configurable" : {"thread_id" : "1"}}
+logger = logs("backend.log")
 
-def run_reception_graph(user_input: str):
+_workflow = None
+_workflow_lock = threading.Lock()
+
+
+class _SessionLock:
+    """Per-thread-id lock; held in a WeakValueDictionary so idle sessions cost nothing."""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+
+
+_session_locks: "WeakValueDictionary[str, _SessionLock]" = WeakValueDictionary()
+
+
+def get_workflow():
+    """Compile the LangGraph workflow once and share it across all requests."""
+    global _workflow
+    if _workflow is None:
+        with _workflow_lock:
+            if _workflow is None:
+                _workflow = graph()
+    return _workflow
+
+
+def warmup() -> None:
+    """
+    Pay every one-off startup cost ahead of the first request: compile the workflow,
+    open the vector store and embed a throwaway query, and build the LLM and web
+    search clients.
+    """
+    get_workflow()
+    registry.warmup()
+    get_decision_llm()
+    get_clinical_llm()
+    get_web_search()
+    logger.info("Backend warmup complete")
+
+
+def _session_lock(thread_id: str) -> _SessionLock:
+    # only touched from the event loop thread, so no extra guard is needed
+    session = _session_locks.get(thread_id)
+    if session is None:
+        session = _SessionLock()
+        _session_locks[thread_id] = session
+    return session
+
+
+def _run_config(thread_id: str) -> Dict[str, Any]:
+    # the metrics handler records node, tool and LLM timings for /metrics
+    return {"configurable": {"thread_id": thread_id}, "callbacks": [metrics_handler]}
+
+
+def _initial_state(user_input: str) -> AgentState:
+    return {
+        "messages": [HumanMessage(content=user_input)],
+        "user_inputs": [HumanMessage(content=user_input)]
+    }
+
+
+def ai_responses(state: Dict[str, Any]) -> List[str]:
+    """Non-empty AI message texts of a graph state, in order."""
+    return [
+        msg.content.strip()
+        for msg in state.get("messages", [])
+        if isinstance(msg, AIMessage) and isinstance(msg.content, str) and msg.content.strip()
+    ]
+
+
+async def run_reception_graph(user_input: str, thread_id: str):
     try:
         # Initialize state with patient message
-        initial_state: AgentState = {
-            "messages": [HumanMessage(content=user_input)],
-            "user_inputs": [HumanMessage(content=user_input)]
-        }
-        
-        print("🧩 Running Reception Graph...")
-        workflow = graph()
-        result = workflow.invoke(initial_state, config=thread)
-        print("✅ Graph Execution Completed.\n")
-        print("---- Result State ----")
-        print(result)
-        
+        initial_state = _initial_state(user_input)
+        config = _run_config(thread_id)
+
+        workflow = get_workflow()
+
+        # Turns of the same conversation must not interleave on one checkpoint history;
+        # different sessions never contend for this lock and run concurrently.
+        session = _session_lock(thread_id)
+        async with session.lock:
+            result = await workflow.ainvoke(initial_state, config=config)
+        logger.info("Graph run completed: %s", MessageSummary(result.get("messages", [])))
+
         # Return the graph output directly
         return result
     
     except Exception as e:
-        print(f"❌ Error running graph: {e}")
-        raise
\ No newline at end of file
+        logger.exception("Error running graph: %s", e)
+        raise
+
+
+async def stream_reception_graph(user_input: str, thread_id: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Drive the graph with astream and yield (event, data) pairs as they happen:
+      - ("node",  {"node": name})            when a node finishes,
+      - ("token", {"node": name, "id": message id, "content": text}) for every LLM chunk,
+      - ("done",  {"responses": [...]})      with the AI messages produced by this turn.
+    """
+    initial_state = _initial_state(user_input)
+    config = _run_config(thread_id)
+    workflow = get_workflow()
+
+    session = _session_lock(thread_id)
+    async with session.lock:
+        previous = await workflow.aget_state(config)
+        seen_ids = {msg.id for msg in previous.values.get("messages", [])}
+
+        async for mode, chunk in workflow.astream(
+            initial_state, config=config, stream_mode=["messages", "updates"]
+        ):
+            if mode == "messages":
+                message, metadata = chunk
+                if isinstance(message, AIMessageChunk) and isinstance(message.content, str) and message.content:
+                    yield "token", {
+                        "node": metadata.get("langgraph_node"),
+                        "id": message.id,
+                        "content": message.content,
+                    }
+            elif mode == "updates":
+                for node in chunk:
+                    if not node.startswith("__"):  # skip "__interrupt__" and other internals
+                        yield "node", {"node": node}
+
+        final_state = await workflow.aget_state(config)
+
+    new_messages = [msg for msg in final_state.values.get("messages", []) if msg.id not in seen_ids]
+    yield "done", {"responses": ai_responses({"messages": new_messages})}
@@ -1,5 +1,11 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import Any, Dict, Optional
+import asyncio
+import json
+import time
+import uuid
 import sys
 import os
 
@@ -7,27 +13,124 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-from backend import run_reception_graph
+# Only light modules are imported here. The agent graph, Qdrant, the embedding model
+# and the LLM clients load in the background warmup (or on first use), so a worker
+# starts serving /health at once and reports /ready when the warmup has finished.
+# The chat endpoints answer 503 until then instead of importing the backend themselves.
+from src.logger.logg import logs
+from src.monitoring.metrics import registry as metrics_registry
 
-app = FastAPI()
+logger = logs("server.log")
+
+_readiness: Dict[str, Any] = {"status": "starting", "error": None, "warmup_seconds": None}
+
+
+def _import_and_warm_up() -> None:
+    # the import itself takes seconds, so it runs off the event loop as well
+    import backend
+
+    backend.warmup()
+
+
+async def _warmup() -> None:
+    started = time.perf_counter()
+    try:
+        await asyncio.to_thread(_import_and_warm_up)
+        _readiness.update(status="ready", warmup_seconds=round(time.perf_counter() - started, 3))
+        logger.info("Worker ready after %.2fs warmup", _readiness["warmup_seconds"])
+    except Exception as e:
+        _readiness.update(status="failed", error=str(e))
+        logger.exception("Warmup failed, worker stays unready: %s", e)
+
+
+def _require_ready() -> None:
+    """Reject a request with 503 (and Retry-After) until the warmup has loaded the backend."""
+    if _readiness["status"] != "ready":
+        raise HTTPException(
+            status_code=503, detail=f"Worker not ready (warmup {_readiness['status']})", headers={"Retry-After": "5"}
+        )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up without blocking startup; keep a reference so the task is not collected
+    app.state.warmup = asyncio.create_task(_warmup())
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 @app.post("/chat")
-def chat(question: str):
+async def chat(question: str, session_id: Optional[str] = None):
     if not question:
         raise HTTPException(status_code=400, detail='No question was provided')
 
+    # Each conversation gets its own checkpoint thread
+    session_id = session_id or uuid.uuid4().hex
+
+    _require_ready()
+    from backend import ai_responses, run_reception_graph
+
     # Run your LangGraph flow
-    full_response = run_reception_graph(user_input=question)
+    full_response = await run_reception_graph(user_input=question, thread_id=session_id)
 
     # Extract messages
-    ai_messages = []
     try:
-        for msg in full_response.get("messages", []):
-            # Only AI messages and non-empty content
-            if msg.__class__.__name__ == "AIMessage" and msg.content.strip():
-                ai_messages.append(msg.content.strip())
+        ai_messages = ai_responses(full_response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing AI messages: {e}")
 
     # Return JSON for frontend
-    return JSONResponse(content={"responses": ai_messages})
\ No newline at end of file
+    return JSONResponse(content={"responses": ai_messages, "session_id": session_id})
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/chat/stream")
+async def chat_stream(question: str, session_id: Optional[str] = None):
+    """
+    Same conversation semantics as /chat, but streamed as Server-Sent Events:
+    "session", then "node" / "token" events while the graph runs, then "done"
+    (or "error").
+    """
+    if not question:
+        raise HTTPException(status_code=400, detail='No question was provided')
+
+    session_id = session_id or uuid.uuid4().hex
+    _require_ready()
+    from backend import stream_reception_graph
+
+    async def events():
+        yield _sse("session", {"session_id": session_id})
+        try:
+            async for event, data in stream_reception_graph(user_input=question, thread_id=session_id):
+                yield _sse(event, data)
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/metrics")
+async def metrics():
+    """Node, tool, LLM and retrieval timings in the Prometheus text format."""
+    return Response(content=metrics_registry.render(), media_type=metrics_registry.CONTENT_TYPE)
+
+
+@app.get("/health")
+async def health():
+    """Liveness: the worker is up and serving, whether or not the warmup has finished."""
+    return {"status": "ok", "warmup": _readiness["status"]}
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once the warmup has completed, 503 while it runs or after it failed."""
+    status_code = 200 if _readiness["status"] == "ready" else 503
+    return JSONResponse(content=_readiness, status_code=status_code)
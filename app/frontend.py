@@ -1,5 +1,8 @@
 import streamlit as st
 import requests
+import sseclient
+import json
+import uuid
 
 # ---------------- Config ----------------
 BASE_URL = "http://localhost:8000"
@@ -10,6 +13,8 @@ st.title("🩺 Medical Assistant")
 # ---------------- Session Init ----------------
 if "messages" not in st.session_state:
     st.session_state.messages = []  # list of {"role": "user"/"assistant", "content": "..."}
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex  # keeps this conversation on its own backend thread
 
 # ---------------- Chat Display ----------------
 for msg in st.session_state.messages:
@@ -25,24 +30,40 @@ if user_input:
     with st.chat_message("user"):
         st.markdown(user_input)
 
-    # Call backend /chat
+    # Call backend /chat/stream and render tokens as they arrive
     try:
         response = requests.post(
-            f"{BASE_URL}/chat",
-            params={"question": user_input},
+            f"{BASE_URL}/chat/stream",
+            params={"question": user_input, "session_id": st.session_state.session_id},
+            headers={"Accept": "text/event-stream"},
+            stream=True,
             timeout=300
         )
     except requests.RequestException as e:
         st.error(f"⚠️ Could not reach server: {e}")
     else:
         if response.status_code == 200:
-            try:
-                data = response.json()
-                ai_messages = data.get("responses", [])
-            except Exception:
-                ai_messages = [response.text]
+            status = st.empty()
+            with st.chat_message("assistant"):
+                live = st.empty()
+            partial = {}  # message id -> text streamed so far
+            ai_messages = []
 
-            # Display
+            for event in sseclient.SSEClient(response).events():
+                data = json.loads(event.data)
+                if event.event == "token":
+                    partial[data["id"]] = partial.get(data["id"], "") + data["content"]
+                    live.markdown("\n\n".join(partial.values()))
+                elif event.event == "node":
+                    status.caption(f"⏳ {data['node']}")
+                elif event.event == "done":
+                    ai_messages = data.get("responses", [])
+                elif event.event == "error":
+                    st.error(f"❌ Server error: {data.get('detail')}")
+            status.empty()
+            live.empty()
+
+            # Display the final, complete messages of this turn
             for ai_msg in ai_messages:
                 st.session_state.messages.append({"role": "assistant", "content": ai_msg})
                 with st.chat_message("assistant"):
@@ -0,0 +1,179 @@
+"""
+Accuracy / latency / cold-start comparison of the embedding backends.
+
+Embeds the same texts with the torch backend (sentence-transformers, the reference)
+and with the ONNX backend, fp32 and int8, all through load_embed_model without the
+cache. For each ONNX variant it reports:
+
+  - cosine similarity to the torch vector of every text (min / mean),
+  - top-k agreement: for held-out queries, the overlap of the top-k chunks found
+    with ONNX vectors and with torch vectors over the same corpus,
+  - single-query embed_query latency p50 / p95 and embed_documents throughput,
+  - cold start in a fresh interpreter: seconds from the first import to the first
+    query vector, and whether torch was imported on the way.
+
+Texts are chunks of --pdf, or a built-in set of medical sentences without one. The
+run fails (exit code 1) if any ONNX variant falls below --min-cosine, so it doubles
+as the check to run before switching EMBEDDING_BACKEND to "onnx". Needs the "onnx"
+extra (uv sync --extra onnx).
+
+    python benchmarks/bench_embeddings.py --pdf Data/nephrology.pdf --chunks 500 --threads 1 2 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import numpy as np
+
+from src.config import settings
+from src.Rag.embed import load_embed_model
+
+SAMPLE_TEXTS = [
+    "Chronic kidney disease is defined by a GFR below 60 ml/min/1.73 m2 for more than three months.",
+    "ACE inhibitors reduce proteinuria and slow the progression of diabetic nephropathy.",
+    "Hyperkalemia above 6.5 mmol/l with ECG changes requires immediate calcium gluconate.",
+    "Nephrotic syndrome presents with proteinuria over 3.5 g/day, hypoalbuminemia and edema.",
+    "Acute kidney injury is staged by the rise in serum creatinine and the fall in urine output.",
+    "Metformin should be stopped when the eGFR falls below 30 ml/min.",
+    "IgA nephropathy often follows an upper respiratory infection with visible hematuria.",
+    "Peritoneal dialysis uses the peritoneum as a semi-permeable membrane.",
+    "Renal artery stenosis should be suspected in resistant hypertension with a rising creatinine on ACE inhibitors.",
+    "Polycystic kidney disease is inherited in an autosomal dominant pattern in most families.",
+    "Hemodialysis patients need phosphate binders and a restricted potassium intake.",
+    "Minimal change disease responds to corticosteroids in most children.",
+]
+
+SAMPLE_QUERIES = [
+    "when to stop metformin in kidney failure",
+    "treatment of high potassium",
+    "what causes nephrotic syndrome",
+    "dialysis diet",
+    "blood in urine after a sore throat",
+]
+
+COLD_START = """
+import sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+from src.Rag.embed import load_embed_model
+model = load_embed_model(cache_path=None, backend={backend!r})
+model.embed_query("warm up")
+print(__import__("json").dumps({{"seconds": time.perf_counter() - started, "torch": "torch" in sys.modules}}))
+"""
+
+
+def load_texts(pdf: str, chunks: int) -> List[str]:
+    if not pdf:
+        return SAMPLE_TEXTS
+    from src.Rag.chunk_docs import iter_chunks
+    from src.Rag.data import iter_pdf_pages
+
+    texts = []
+    for chunk in iter_chunks(iter_pdf_pages(pdf)):
+        texts.append(chunk.page_content)
+        if len(texts) >= chunks:
+            break
+    return texts
+
+
+def top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> List[set]:
+    scores = queries @ corpus.T
+    return [set(np.argsort(-row)[:k].tolist()) for row in scores]
+
+
+def measure(model, texts: List[str], queries: List[str], repeats: int) -> Dict:
+    model.embed_query(queries[0])  # warm up
+    latencies = []
+    for _ in range(repeats):
+        for query in queries:
+            started = time.perf_counter()
+            model.embed_query(query)
+            latencies.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    vectors = np.asarray(model.embed_documents(texts), dtype=np.float32)
+    seconds = time.perf_counter() - started
+    return {
+        "vectors": vectors,
+        "queries": np.asarray(model.embed_documents(queries), dtype=np.float32),
+        "latencies": np.asarray(latencies) * 1000,
+        "throughput": len(texts) / seconds,
+    }
+
+
+def cold_start(backend: str) -> Dict:
+    output = subprocess.run(
+        [sys.executable, "-c", COLD_START.format(root=project_root, backend=backend)],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare torch and ONNX (fp32 / int8) embedding backends.")
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL_NAME)
+    parser.add_argument("--pdf", default="", help="embed chunks of this PDF instead of the built-in sentences")
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=20, help="passes over the queries for the latency figures")
+    parser.add_argument("--threads", type=int, nargs="+", default=[settings.ONNX_INTRA_OP_THREADS],
+                        help="ONNX Runtime intra-op thread counts to try (0 = one per physical core)")
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--skip-cold-start", action="store_true")
+    args = parser.parse_args()
+
+    texts = load_texts(args.pdf, args.chunks)
+    queries = SAMPLE_QUERIES if not args.pdf else texts[-len(SAMPLE_QUERIES):]
+    corpus = texts if not args.pdf else texts[:-len(SAMPLE_QUERIES)]
+    k = min(args.top_k, len(corpus))
+    print(f"{len(corpus)} texts, {len(queries)} queries, model {args.model}\n")
+
+    reference = measure(load_embed_model(args.model, cache_path=None, backend="torch"), corpus, queries, args.repeats)
+    reference_top = top_k(reference["vectors"], reference["queries"], k)
+
+    from src.Rag.onnx_embed import OnnxEmbeddings, export_onnx_model
+
+    print(f"{'backend':<14}{'threads':>8}{'cos min':>9}{'cos mean':>10}{'top-k agree':>13}{'p50 ms':>9}{'p95 ms':>9}{'docs/s':>9}")
+    print(
+        f"{'torch':<14}{'-':>8}{1.0:>9.4f}{1.0:>10.4f}{1.0:>13.3f}"
+        f"{np.percentile(reference['latencies'], 50):>9.2f}{np.percentile(reference['latencies'], 95):>9.2f}"
+        f"{reference['throughput']:>9.1f}"
+    )
+    failed = False
+    for quantize in (False, True):
+        model_path = export_onnx_model(args.model, settings.ONNX_MODEL_DIR, quantize)
+        label = "onnx-int8" if quantize else "onnx-fp32"
+        for threads in args.threads:
+            result = measure(OnnxEmbeddings(model_path, intra_op_threads=threads), corpus, queries, args.repeats)
+            cosines = np.sum(result["vectors"] * reference["vectors"], axis=1)
+            agreement = np.mean([
+                len(found & expected) / k
+                for found, expected in zip(top_k(result["vectors"], result["queries"], k), reference_top)
+            ])
+            failed |= bool(cosines.min() < args.min_cosine)
+            print(
+                f"{label:<14}{threads or 'auto':>8}{cosines.min():>9.4f}{cosines.mean():>10.4f}{agreement:>13.3f}"
+                f"{np.percentile(result['latencies'], 50):>9.2f}{np.percentile(result['latencies'], 95):>9.2f}"
+                f"{result['throughput']:>9.1f}"
+            )
+
+    if not args.skip_cold_start:
+        print("\nCold start (fresh interpreter, import to first query vector):")
+        for backend in ("torch", "onnx"):
+            start = cold_start(backend)
+            print(f"  {backend:<6}{start['seconds']:>7.2f} s   torch imported: {start['torch']}")
+
+    if failed:
+        print(f"\nAn ONNX variant fell below cosine {args.min_cosine} against torch; keep EMBEDDING_BACKEND=torch.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
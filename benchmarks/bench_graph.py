@@ -0,0 +1,325 @@
+"""
+Offline end-to-end latency benchmark for the agent graph.
+
+Drives graph() through scripted multi-turn conversations, resuming past the
+interrupt before the clinical agent like a client would, with every external
+provider replaced by a local stand-in:
+  - the reception and clinical ChatGroq models by deterministic scripted chat models,
+  - the Tavily web search by a fixed-result tool,
+  - the embedding model by deterministic fake embeddings over a small temporary
+    Qdrant collection and BM25 index, served through the shared registry,
+  - the discharge reports by a small temporary JSON file.
+Everything else (routing, tools, caches, checkpointing, compaction) is the real
+code, so the numbers show the overhead of this project apart from provider latency.
+
+Reports per-node and end-to-end p50/p95/p99 latency, then repeats the run under
+tracemalloc to report how far traced memory peaks above its starting level
+per turn and per node.
+
+    python benchmarks/bench_graph.py --conversations 50 --turns 3
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+
+# Isolated storage and placeholder keys; must be set before src.config is imported.
+_WORKDIR = tempfile.mkdtemp(prefix="bench_graph_")
+for _name, _value in {
+    "QDRANT_PATH": os.path.join(_WORKDIR, "qdrant"),
+    "QDRANT_COLLECTION_NAME": "bench",
+    "INDEX_VERSION_PATH": os.path.join(_WORKDIR, "index_versions.json"),
+    "SPARSE_INDEX_PATH": os.path.join(_WORKDIR, "sparse_index.sqlite"),
+    "PATIENT_REPORTS_PATH": os.path.join(_WORKDIR, "reports.json"),
+    "EMBEDDING_CACHE_PATH": "",
+    "CHECKPOINT_DB_PATH": os.path.join(_WORKDIR, "checkpoints.sqlite"),
+    "LLM_CACHE_PATH": "",
+    "LOG_DIR": "",
+    "GROQ_API_KEY": "offline-benchmark",
+    "TAVILY_API_KEY": "offline-benchmark",
+}.items():
+    os.environ[_name] = _value
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import numpy as np
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langgraph.prebuilt import ToolNode
+
+from src.config import settings
+from src.Rag.ingest import ensure_collection, point_id, upsert_batch
+from src.Rag.registry import registry
+from src.Rag.retrieval_cache import retrieval_cache
+import src.Rag.agent.agent as agent
+
+PATIENTS = ["Asha Verma", "Rahul Mehta", "Meera Iyer", "John Carter"]
+QUESTIONS = [
+    "Should my furosemide dose change now that my ankles are swollen?",
+    "What does a potassium of 5.8 mmol/L mean for someone with CKD stage 3?",
+    "Is it safe to take ibuprofen for back pain with my kidney function?",
+]
+PASSAGES = [
+    "Loop diuretics such as furosemide are titrated to volume status and daily weights.",
+    "Hyperkalemia above 5.5 mmol/L in CKD warrants review of ACE inhibitors and diet.",
+    "NSAIDs reduce renal blood flow and can precipitate acute kidney injury in CKD.",
+    "eGFR between 30 and 59 mL/min/1.73m2 corresponds to CKD stage 3.",
+    "Peritoneal dialysis and hemodialysis have comparable survival in most patients.",
+]
+
+
+# --------------------------------------------------------------------------- stand-ins
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model whose reply is computed by `script` from the prompt; no network, no randomness."""
+
+    script: Callable[[List[BaseMessage], int], AIMessage]
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        return ChatResult(generations=[ChatGeneration(message=self.script(messages, self.calls))])
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(m.content if isinstance(m.content, str) else str(m.content) for m in messages)
+
+
+def reception_script(patient_name: str) -> Callable[[List[BaseMessage], int], AIMessage]:
+    """Ask for the report while none is in the prompt, then reply with follow-up questions."""
+
+    def script(messages: List[BaseMessage], call: int) -> AIMessage:
+        prompt = _prompt_text(messages)
+        if '"patient_name"' not in prompt:
+            return AIMessage(
+                content="Let me pull up your report now.",
+                tool_calls=[{
+                    "name": "database_retriever_tool",
+                    "args": {"patient_name": patient_name},
+                    "id": f"call_db_{call}",
+                }],
+            )
+        return AIMessage(content="Thanks, I found your discharge report. How has your swelling been since discharge?")
+
+    return script
+
+
+def clinical_script(messages: List[BaseMessage], call: int) -> AIMessage:
+    """Alternate between one retrieval tool call and a final answer."""
+    if call % 2:
+        prompt = _prompt_text(messages)
+        query = next((q for q in QUESTIONS if q in prompt), QUESTIONS[0])
+        return AIMessage(
+            content="",
+            tool_calls=[{"name": "vector_retriever_tool", "args": {"query": query}, "id": f"call_rag_{call}"}],
+        )
+    return AIMessage(content="TL;DR: please confirm with your nephrologist. " + " ".join(PASSAGES[:2]))
+
+
+@tool("tavily_search")
+def fake_web_search(query: str) -> Dict[str, Any]:
+    """Fixed web search results."""
+    return {"query": query, "results": [{"title": "Stub result", "url": "https://example.org", "content": PASSAGES[0]}]}
+
+
+def build_fixtures(dim: int) -> None:
+    with open(settings.PATIENT_REPORTS_PATH, "w", encoding="utf-8") as f:
+        json.dump(
+            [{"patient_name": name, "diagnosis": "CKD stage 3", "medications": ["furosemide 40 mg"]} for name in PATIENTS],
+            f,
+        )
+
+    embeddings = DeterministicFakeEmbedding(size=dim)
+    registry.set_embeddings(settings.EMBEDDING_MODEL_NAME, embeddings)
+    client = registry.get_client(settings.QDRANT_PATH)
+    ensure_collection(client, settings.QDRANT_COLLECTION_NAME, dim)
+    chunks = [
+        Document(page_content=text, metadata={"id": f"bench.pdf : {i}:0", "source": "bench.pdf", "page": i})
+        for i, text in enumerate(PASSAGES * 20)
+    ]
+    upsert_batch(client, settings.QDRANT_COLLECTION_NAME, chunks, embeddings.embed_documents([c.page_content for c in chunks]))
+    registry.get_sparse_index().add(
+        settings.QDRANT_COLLECTION_NAME, chunks, [point_id(c.metadata["id"]) for c in chunks]
+    )
+
+
+def build_workflow(patient_name: str):
+    reception_llm = ScriptedChatModel(script=reception_script(patient_name)).bind_tools([agent.database_retriever_tool])
+    clinical_llm = ScriptedChatModel(script=clinical_script).bind_tools([fake_web_search, agent.vector_retriever_tool])
+    agent.get_decision_llm = lambda: reception_llm
+    agent.get_clinical_llm = lambda: clinical_llm
+    agent.clinical_tool_node = ToolNode([fake_web_search, agent.vector_retriever_tool])
+    return agent.graph()
+
+
+# --------------------------------------------------------------------------- measurement
+
+class NodeTimer(BaseCallbackHandler):
+    """
+    Times every graph node run. With `trace_memory` it also records how far traced
+    memory peaked above its level at node start, and tracks the turn-wide peak
+    across the tracemalloc.reset_peak() calls that per-node peaks need.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self.allocated: Dict[str, List[int]] = defaultdict(list)
+        self._open: Dict[UUID, tuple] = {}
+        self._peak = 0
+
+    def _observe_peak(self) -> int:
+        current, peak = tracemalloc.get_traced_memory()
+        self._peak = max(self._peak, peak)
+        return current
+
+    def begin_turn(self) -> int:
+        self._peak = 0
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def end_turn(self, baseline: int) -> int:
+        self._observe_peak()
+        return self._peak - baseline
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            memory = 0
+            if self.trace_memory:
+                memory = self._observe_peak()
+                tracemalloc.reset_peak()
+            self._open[run_id] = (node, time.perf_counter(), memory)
+
+    def _close(self, run_id: UUID) -> None:
+        entry = self._open.pop(run_id, None)
+        if entry is None:
+            return
+        node, started, memory = entry
+        self.durations[node].append(time.perf_counter() - started)
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            self._observe_peak()
+            self.allocated[node].append(peak - memory)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._close(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._close(run_id)
+
+
+def conversation(turns: int, offset: int) -> List[str]:
+    """Greeting with the patient's name, then `turns` clinical questions."""
+    messages = [f"Hi, I am {PATIENTS[offset % len(PATIENTS)]}, I was discharged last week."]
+    messages += [QUESTIONS[(offset + turn) % len(QUESTIONS)] for turn in range(turns)]
+    return messages
+
+
+def run_turn(workflow, message: str, config: Dict[str, Any], max_resumes: int = 8) -> float:
+    """
+    One user turn: run the graph on the message, then resume past every interrupt
+    before clinical_agent until the graph finishes. Returns the time spent in the graph.
+    """
+    state: Optional[Dict[str, Any]] = {"messages": [HumanMessage(content=message)], "user_inputs": [HumanMessage(content=message)]}
+    elapsed = 0.0
+    for _ in range(max_resumes + 1):
+        started = time.perf_counter()
+        workflow.invoke(state, config)
+        elapsed += time.perf_counter() - started
+        if not workflow.get_state(config).next:
+            break
+        state = None
+    return elapsed
+
+
+def run(conversations: int, turns: int, trace_memory: bool, cold: bool, tag: str):
+    timer = NodeTimer(trace_memory=trace_memory)
+    turn_seconds: List[float] = []
+    turn_bytes: List[int] = []
+    for c in range(conversations):
+        workflow = build_workflow(PATIENTS[c % len(PATIENTS)])
+        config = {"configurable": {"thread_id": f"{tag}-{c}"}, "callbacks": [timer]}
+        if cold:
+            retrieval_cache.clear()
+        for message in conversation(turns, c):
+            baseline = timer.begin_turn() if trace_memory else 0
+            turn_seconds.append(run_turn(workflow, message, config))
+            if trace_memory:
+                turn_bytes.append(timer.end_turn(baseline))
+    return timer, turn_seconds, turn_bytes
+
+
+def percentiles_ms(samples: List[float]) -> str:
+    p50, p95, p99 = np.percentile(np.asarray(samples) * 1000.0, [50, 95, 99])
+    return f"{p50:9.2f} {p95:9.2f} {p99:9.2f}"
+
+
+def kib(samples: List[int]) -> str:
+    values = np.asarray(samples) / 1024.0
+    return f"{np.median(values):10.1f} {values.max():10.1f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=30)
+    parser.add_argument("--turns", type=int, default=3, help="clinical questions per conversation")
+    parser.add_argument("--warmup", type=int, default=3, help="conversations run before measuring")
+    parser.add_argument("--dim", type=int, default=384, help="fake embedding size")
+    parser.add_argument("--cold", action="store_true", help="clear the retrieval cache before every conversation")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--verbose", action="store_true", help="keep application logging enabled")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    build_fixtures(args.dim)
+    run(args.warmup, args.turns, trace_memory=False, cold=args.cold, tag="warmup")
+
+    timer, turn_seconds, _ = run(args.conversations, args.turns, trace_memory=False, cold=args.cold, tag="latency")
+    print(f"{args.conversations} conversations x {args.turns + 1} user turns")
+    print(f"\n{'latency (ms)':<22} {'n':>6} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for node, samples in sorted(timer.durations.items()):
+        print(f"{node:<22} {len(samples):>6} {percentiles_ms(samples)}")
+    print(f"{'end-to-end turn':<22} {len(turn_seconds):>6} {percentiles_ms(turn_seconds)}")
+
+    if not args.no_memory:
+        tracemalloc.start()
+        timer, _, turn_bytes = run(args.conversations, args.turns, trace_memory=True, cold=args.cold, tag="memory")
+        tracemalloc.stop()
+        print(f"\n{'peak allocated (KiB)':<22} {'n':>6} {'median':>10} {'max':>10}")
+        for node, samples in sorted(timer.allocated.items()):
+            print(f"{node:<22} {len(samples):>6} {kib(samples)}")
+        print(f"{'end-to-end turn':<22} {len(turn_bytes):>6} {kib(turn_bytes)}")
+
+    registry.close()
+    agent.get_checkpointer().close()
+    shutil.rmtree(_WORKDIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
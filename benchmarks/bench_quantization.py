@@ -0,0 +1,221 @@
+"""
+Recall / latency / memory comparison of the Qdrant quantization modes.
+
+Takes vectors from an existing collection (--source-collection) or generates
+clustered synthetic unit vectors, holds out --queries of them as queries and
+computes their exact cosine top-k as ground truth. Then, for every mode
+(none, scalar int8, binary) and oversampling factor, it reports recall@k against
+that ground truth, search latency and the memory the vectors take.
+
+With --url every mode is measured on a real Qdrant server: a temporary collection
+per mode is created with ensure_collection and searched with search_params()
+(oversampled quantized search rescored on the original vectors). The embedded
+store ignores quantization, so without a server the same schemes are simulated
+in numpy instead: int8 codes clipped at the 0.99 quantile and 1-bit sign codes,
+scored by brute force, with the oversampled candidates rescored in float32.
+Simulated latencies show the relative cost only, not HNSW search times.
+
+Memory is what each mode keeps in RAM per vector (float32 = 4 B/dim, int8 = 1 B/dim,
+binary = 1 bit/dim) plus the float32 originals that quantized modes keep on disk.
+
+    python benchmarks/bench_quantization.py --points 20000 --oversampling 1 2 4
+    python benchmarks/bench_quantization.py --url http://localhost:6333 --source-collection Medicare
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import numpy as np
+from qdrant_client.models import PointStruct
+
+from src.config import settings
+from src.Rag.ingest import ensure_collection
+from src.Rag.retrieve import make_client, search_params
+
+MODES = ("none", "scalar", "binary")
+
+
+# --------------------------------------------------------------------------- data
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+
+
+def synthetic_vectors(count: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Unit vectors around a few hundred topic centres, closer to real embeddings than pure noise."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(count // 100, 8), dim)).astype(np.float32)
+    assigned = centres[rng.integers(0, len(centres), count)]
+    return normalize(assigned + 0.6 * rng.standard_normal((count, dim)).astype(np.float32))
+
+
+def collection_vectors(path: str, collection_name: str) -> np.ndarray:
+    client = make_client(path=path)
+    vectors: List[List[float]] = []
+    offset = None
+    while True:
+        points, offset = client.scroll(collection_name, limit=1024, offset=offset, with_vectors=True, with_payload=False)
+        vectors.extend(point.vector for point in points)
+        if offset is None:
+            break
+    client.close()
+    return normalize(np.asarray(vectors, dtype=np.float32))
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(top, order, axis=1)
+
+
+def recall(found: List[List[int]], truth: np.ndarray) -> float:
+    return float(np.mean([len(set(ids) & set(row.tolist())) / len(row) for ids, row in zip(found, truth)]))
+
+
+def memory_mib(mode: str, count: int, dim: int) -> Tuple[float, float]:
+    """(RAM, disk) MiB used by the vectors of `count` points in `mode`."""
+    ram_bytes = {"none": 4 * dim, "scalar": dim, "binary": (dim + 7) // 8}[mode]
+    disk_bytes = 0 if mode == "none" else 4 * dim
+    return count * ram_bytes / 2**20, count * disk_bytes / 2**20
+
+
+# --------------------------------------------------------------------------- simulated search
+
+class SimulatedIndex:
+    """Brute-force numpy model of Qdrant's quantized search with oversampling and rescoring."""
+
+    def __init__(self, corpus: np.ndarray, mode: str):
+        self.corpus = corpus
+        self.mode = mode
+        if mode == "scalar":
+            low, high = np.quantile(corpus, [0.005, 0.995])
+            self.low, self.scale = float(low), float(high - low) / 255.0
+            self.codes = np.round((corpus.clip(low, high) - low) / self.scale).astype(np.uint8)
+        elif mode == "binary":
+            self.codes = np.packbits(corpus > 0, axis=1)
+
+    def _approximate(self, query: np.ndarray) -> np.ndarray:
+        if self.mode == "scalar":
+            # q . (low + scale * code) ranks like q . code
+            return self.codes @ query
+        query_bits = np.packbits(query > 0)
+        return -np.bitwise_count(self.codes ^ query_bits).sum(axis=1, dtype=np.int32)
+
+    def search(self, query: np.ndarray, k: int, oversampling: float) -> List[int]:
+        if self.mode == "none":
+            scores = self.corpus @ query
+            top = np.argpartition(-scores, k)[:k]
+            return top[np.argsort(-scores[top])].tolist()
+        approx = self._approximate(query)
+        limit = min(len(approx) - 1, max(k, int(round(k * oversampling))))
+        candidates = np.argpartition(-approx, limit)[:limit]
+        rescored = self.corpus[candidates] @ query
+        return candidates[np.argsort(-rescored)[:k]].tolist()
+
+
+def run_simulated(corpus: np.ndarray, queries: np.ndarray, k: int, oversampling: List[float]) -> List[Dict]:
+    rows = []
+    for mode in MODES:
+        index = SimulatedIndex(corpus, mode)
+        for factor in (oversampling if mode != "none" else [1.0]):
+            found, latencies = [], []
+            for query in queries:
+                started = time.perf_counter()
+                found.append(index.search(query, k, factor))
+                latencies.append(time.perf_counter() - started)
+            rows.append({"mode": mode, "oversampling": factor, "found": found, "latencies": latencies})
+    return rows
+
+
+# --------------------------------------------------------------------------- Qdrant server
+
+def wait_until_indexed(client, collection_name: str, timeout: float = 600.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if str(client.get_collection(collection_name).status).lower().endswith("green"):
+            return
+        time.sleep(0.5)
+    raise SystemExit(f"collection {collection_name} was not indexed within {timeout:.0f}s")
+
+
+def run_server(url: str, corpus: np.ndarray, queries: np.ndarray, k: int, oversampling: List[float], keep: bool) -> List[Dict]:
+    client = make_client(url=url, api_key=settings.QDRANT_API_KEY)
+    rows = []
+    for mode in MODES:
+        name = f"bench_quantization_{mode}"
+        if client.collection_exists(name):
+            client.delete_collection(name)
+        ensure_collection(client, name, corpus.shape[1], quantization=mode)
+        for start in range(0, len(corpus), 512):
+            client.upsert(
+                name,
+                points=[PointStruct(id=start + i, vector=vector.tolist()) for i, vector in enumerate(corpus[start:start + 512])],
+                wait=True,
+            )
+        wait_until_indexed(client, name)
+
+        for factor in (oversampling if mode != "none" else [1.0]):
+            params = search_params(client, mode, rescore=True, oversampling=factor)
+            found, latencies = [], []
+            for query in queries:
+                started = time.perf_counter()
+                points = client.query_points(name, query=query.tolist(), limit=k, search_params=params).points
+                latencies.append(time.perf_counter() - started)
+                found.append([int(point.id) for point in points])
+            rows.append({"mode": mode, "oversampling": factor, "found": found, "latencies": latencies})
+        if not keep:
+            client.delete_collection(name)
+    client.close()
+    return rows
+
+
+# --------------------------------------------------------------------------- report
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare Qdrant quantization modes for recall, latency and memory.")
+    parser.add_argument("--url", default=settings.QDRANT_URL, help="Qdrant server; empty simulates the modes in numpy")
+    parser.add_argument("--source-collection", default="", help="take vectors from this collection instead of synthetic ones")
+    parser.add_argument("--source-path", default=settings.QDRANT_PATH, help="embedded store holding --source-collection")
+    parser.add_argument("--points", type=int, default=20000, help="synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=384, help="synthetic vector size (all-MiniLM-L6-v2: 384)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--oversampling", type=float, nargs="+", default=[1.0, settings.QDRANT_OVERSAMPLING, 4.0])
+    parser.add_argument("--keep", action="store_true", help="keep the server collections afterwards")
+    args = parser.parse_args()
+
+    if args.source_collection:
+        vectors = collection_vectors(args.source_path, args.source_collection)
+        np.random.default_rng(0).shuffle(vectors)
+    else:
+        vectors = synthetic_vectors(args.points + args.queries, args.dim)
+    queries, corpus = vectors[:args.queries], vectors[args.queries:]
+    truth = exact_top_k(corpus, queries, args.top_k)
+
+    if args.url:
+        rows = run_server(args.url, corpus, queries, args.top_k, args.oversampling, args.keep)
+        where = f"Qdrant server {args.url}"
+    else:
+        rows = run_simulated(corpus, queries, args.top_k, args.oversampling)
+        where = "numpy simulation (brute force)"
+
+    print(f"{len(corpus)} vectors x {corpus.shape[1]} dims, {len(queries)} queries, top_k={args.top_k}, {where}\n")
+    print(f"{'mode':<8}{'oversampling':>13}{'recall@k':>10}{'p50 ms':>9}{'p95 ms':>9}{'RAM MiB':>10}{'disk MiB':>10}")
+    for row in rows:
+        ram, disk = memory_mib(row["mode"], len(corpus), corpus.shape[1])
+        latencies = np.asarray(row["latencies"]) * 1000
+        print(
+            f"{row['mode']:<8}{row['oversampling']:>13.1f}{recall(row['found'], truth):>10.3f}"
+            f"{np.percentile(latencies, 50):>9.2f}{np.percentile(latencies, 95):>9.2f}{ram:>10.1f}{disk:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
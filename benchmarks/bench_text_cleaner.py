@@ -0,0 +1,108 @@
+"""
+Micro-benchmark for src/Rag/text_cleaner.py.
+
+Compares the original per-line / per-character cleaner with the current
+clean_text on synthetic, PDF-like text, checks that both produce identical output
+and reports throughput in MB/s.
+
+    python benchmarks/bench_text_cleaner.py --chunks 5000 --workers 4
+"""
+import argparse
+import random
+import re
+import string
+import sys
+import os
+import time
+from typing import List
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from langchain_core.documents import Document
+
+from src.Rag.text_cleaner import clean_text
+
+
+def legacy_clean_text(chunks: List[Document]) -> List[Document]:
+    """The cleaner as it was before the rewrite, kept here as the baseline."""
+    cleaned_documents = []
+    for doc in chunks:
+        lines = doc.page_content.splitlines()
+        cleaned_lines = []
+        for line in lines:
+            line = line.strip()
+            line = re.sub(r"[ \t]+", " ", line)
+            line = "".join(char for char in line if char in string.printable)
+            cleaned_lines.append(line)
+        cleaned_documents.append(Document(page_content="\n".join(cleaned_lines), metadata=doc.metadata))
+    return cleaned_documents
+
+
+def synthetic_chunks(count: int, size: int = 1024, seed: int = 0) -> List[Document]:
+    """Chunks resembling extracted PDF text: words, numbers, tabs, odd spacing, ligatures and control bytes."""
+    rnd = random.Random(seed)
+    words = ["eGFR", "creatinine", "mg/dL", "potassium", "K+", "dialysis", "CKD", "stage", "3a",
+             "furosemide", "40", "mmol/L", "glomerular", "ﬁltration", "—", "µmol", "\x0c", "\x07"]
+    separators = [" ", " ", " ", "  ", "\t", " \t ", "\n", "   \n  "]
+    chunks = []
+    for i in range(count):
+        parts = []
+        length = 0
+        while length < size:
+            token = rnd.choice(words) + rnd.choice(separators)
+            parts.append(token)
+            length += len(token)
+        chunks.append(Document(page_content="".join(parts)[:size], metadata={"page": i}))
+    return chunks
+
+
+def ascii_chunks(chunks: List[Document]) -> List[Document]:
+    return [
+        Document(page_content=doc.page_content.encode("ascii", "ignore").decode("ascii"), metadata=doc.metadata)
+        for doc in chunks
+    ]
+
+
+def throughput(func, chunks: List[Document], repeat: int) -> float:
+    megabytes = sum(len(doc.page_content.encode("utf-8")) for doc in chunks) / 1e6
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(chunks)
+        best = min(best, time.perf_counter() - started)
+    return megabytes / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the chunk text cleaner.")
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--size", type=int, default=1024, help="characters per chunk")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=0, help="also time the process-pool mode")
+    args = parser.parse_args()
+
+    datasets = {
+        "mixed unicode": synthetic_chunks(args.chunks, args.size),
+    }
+    datasets["ascii only"] = ascii_chunks(datasets["mixed unicode"])
+
+    for name, chunks in datasets.items():
+        expected = [doc.page_content for doc in legacy_clean_text(chunks)]
+        actual = [doc.page_content for doc in clean_text(chunks)]
+        if expected != actual:
+            raise SystemExit(f"[{name}] new cleaner output differs from the legacy cleaner")
+
+        legacy = throughput(legacy_clean_text, chunks, args.repeat)
+        current = throughput(clean_text, chunks, args.repeat)
+        print(f"[{name}] {args.chunks} chunks x {args.size} chars")
+        print(f"  legacy   : {legacy:8.2f} MB/s")
+        print(f"  current  : {current:8.2f} MB/s  ({current / legacy:.1f}x)")
+        if args.workers > 1:
+            parallel = throughput(lambda c: clean_text(c, workers=args.workers), chunks, args.repeat)
+            print(f"  {args.workers} workers: {parallel:8.2f} MB/s  ({parallel / legacy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
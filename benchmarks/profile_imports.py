@@ -0,0 +1,108 @@
+"""
+Import-time profile of the backend.
+
+Imports each target module in a fresh interpreter with `python -X importtime` and
+reports:
+  - the wall time of the whole import,
+  - the modules with the largest cumulative import time (a package's time includes
+    everything it imports),
+  - which known heavy dependencies (torch, sentence-transformers, Qdrant, the Groq
+    and Tavily clients, LangGraph...) the import pulled in.
+
+The default target is the FastAPI entry point (app/backend/main.py), which must stay
+light: everything heavy belongs to the warmup in backend.warmup() or to first use.
+--budget makes the run fail (exit code 1) when a target imports slower than that
+many seconds or pulls in one of the modules listed with --forbid.
+
+    python benchmarks/profile_imports.py
+    python benchmarks/profile_imports.py --targets main backend src.Rag.agent.agent --top 15
+    python benchmarks/profile_imports.py --budget 1.0 --forbid torch qdrant_client langchain_groq
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+backend_dir = os.path.join(project_root, "app", "backend")
+
+HEAVY_MODULES = (
+    "torch",
+    "sentence_transformers",
+    "transformers",
+    "onnxruntime",
+    "qdrant_client",
+    "langchain_qdrant",
+    "langchain_huggingface",
+    "langchain_groq",
+    "langchain_tavily",
+    "langgraph",
+    "pypdf",
+)
+
+
+def profile(target: str) -> Tuple[float, List[Tuple[str, int, int]]]:
+    """Wall seconds of `import target` plus (module, self us, cumulative us) for every module it loaded."""
+    env = dict(os.environ)
+    # placeholder keys so settings validate; no client is built at import time
+    env.setdefault("GROQ_API_KEY", "profile")
+    env.setdefault("TAVILY_API_KEY", "profile")
+    env["PYTHONPATH"] = os.pathsep.join([backend_dir, project_root, env.get("PYTHONPATH", "")])
+
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True, env=env, cwd=backend_dir,
+    )
+    seconds = time.perf_counter() - started
+    if result.returncode != 0:
+        raise SystemExit(f"import {target} failed:\n{result.stderr[-2000:]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return seconds, modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report import time and heavy dependencies of backend modules.")
+    parser.add_argument("--targets", nargs="+", default=["main"], help="modules to import (app/backend is on the path)")
+    parser.add_argument("--top", type=int, default=20, help="slowest modules to list per target")
+    parser.add_argument("--budget", type=float, default=0.0, help="fail if an import takes longer (seconds); 0 = no check")
+    parser.add_argument("--forbid", nargs="*", default=[], help="fail if a target imports any of these packages")
+    args = parser.parse_args()
+
+    failed = False
+    for target in args.targets:
+        seconds, modules = profile(target)
+        loaded: Dict[str, int] = {}
+        for name, _, cumulative in modules:
+            top_level = name.split(".")[0]
+            loaded[top_level] = max(loaded.get(top_level, 0), cumulative)
+
+        print(f"import {target}: {seconds:.2f} s wall, {len(modules)} modules")
+        print(f"  {'cumulative ms':>14}{'self ms':>9}  module")
+        for name, self_us, cumulative in sorted(modules, key=lambda m: m[2], reverse=True)[:args.top]:
+            print(f"  {cumulative / 1000:>14.1f}{self_us / 1000:>9.1f}  {name}")
+        heavy = [f"{name} ({loaded[name] / 1000:.0f} ms)" for name in HEAVY_MODULES if name in loaded]
+        print(f"  heavy dependencies: {', '.join(heavy) or 'none'}\n")
+
+        forbidden = [name for name in args.forbid if name in loaded]
+        if forbidden:
+            print(f"  FAIL: {target} imports {', '.join(forbidden)}\n")
+            failed = True
+        if args.budget and seconds > args.budget:
+            print(f"  FAIL: {target} took {seconds:.2f} s, budget {args.budget:.2f} s\n")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
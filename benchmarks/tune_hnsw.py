@@ -0,0 +1,164 @@
+"""
+HNSW tuning report: recall@k against latency for m / ef_construct / search-time ef.
+
+Copies the vectors of a collection (or synthetic ones) into one temporary collection
+per (m, ef_construct) pair on a Qdrant server. Each is built through ensure_collection
+with those HNSW settings and an indexing threshold low enough that the graph is really
+built. Then every search-time ef is measured against the exact brute-force top-k of
+held-out queries: recall@k, latency p50/p95/p99 and the build time. A full-scan search
+(exact=True) is the latency baseline.
+
+The fastest configuration (by p95) that reaches --target-recall is printed as the
+settings to use; retrieve_context and vector_retriever_tool pass QDRANT_HNSW_EF to every
+search through search_params(), and ingestion builds new collections with
+QDRANT_HNSW_M / QDRANT_HNSW_EF_CONSTRUCT. --apply also sets the chosen m and
+ef_construct on the source collection (Qdrant rebuilds its graph in the background);
+later ingests keep them, but put them in the settings too so a rebuilt collection gets them.
+
+The embedded store (QdrantClient(path=...)) has no HNSW index and always searches
+exactly, so this needs a server: pass --url or set QDRANT_URL.
+
+    python benchmarks/tune_hnsw.py --url http://localhost:6333 --source-collection Medicare \\
+        --m 8 16 32 --ef-construct 64 128 256 --ef 16 32 64 128
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct, SearchParams
+
+from src.config import settings
+from src.Rag.ingest import apply_index_config, ensure_collection
+from src.Rag.retrieve import make_client, search_params
+from bench_quantization import exact_top_k, normalize, recall, synthetic_vectors, wait_until_indexed
+
+
+def server_vectors(client: QdrantClient, collection_name: str) -> np.ndarray:
+    vectors: List[List[float]] = []
+    offset = None
+    while True:
+        points, offset = client.scroll(collection_name, limit=1024, offset=offset, with_vectors=True, with_payload=False)
+        vectors.extend(point.vector for point in points)  # type: ignore[misc]
+        if offset is None:
+            break
+    return normalize(np.asarray(vectors, dtype=np.float32))
+
+
+def build(client: QdrantClient, name: str, corpus: np.ndarray, m: int, ef_construct: int, threshold_kb: int) -> float:
+    """Create and fill one collection, returning the seconds until its HNSW graph is complete."""
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    started = time.perf_counter()
+    ensure_collection(
+        client, name, corpus.shape[1], quantization="none",
+        hnsw_m=m, hnsw_ef_construct=ef_construct, indexing_threshold_kb=threshold_kb,
+    )
+    for start in range(0, len(corpus), 512):
+        client.upsert(
+            name,
+            points=[PointStruct(id=start + i, vector=vector.tolist()) for i, vector in enumerate(corpus[start:start + 512])],
+            wait=True,
+        )
+    wait_until_indexed(client, name)
+    while (client.get_collection(name).indexed_vectors_count or 0) < len(corpus):
+        time.sleep(0.5)
+    return time.perf_counter() - started
+
+
+def measure(client: QdrantClient, name: str, queries: np.ndarray, k: int, params: Optional[SearchParams]) -> Dict:
+    found, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        points = client.query_points(name, query=query.tolist(), limit=k, search_params=params).points
+        latencies.append(time.perf_counter() - started)
+        found.append([int(point.id) for point in points])
+    return {"found": found, "latencies": np.asarray(latencies) * 1000}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure HNSW recall and latency per m / ef_construct / ef.")
+    parser.add_argument("--url", default=settings.QDRANT_URL, help="Qdrant server (required)")
+    parser.add_argument("--source-collection", default="", help="server collection to take vectors from")
+    parser.add_argument("--points", type=int, default=20000, help="synthetic corpus size without --source-collection")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--ef-construct", type=int, nargs="+", default=[64, 128, 256])
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    parser.add_argument("--indexing-threshold", type=int, default=1, help="KB; keeps Qdrant from full-scanning small segments")
+    parser.add_argument("--target-recall", type=float, default=0.98)
+    parser.add_argument("--apply", action="store_true", help="set the chosen m / ef_construct on --source-collection")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary collections")
+    args = parser.parse_args()
+
+    if not args.url:
+        raise SystemExit("HNSW tuning needs a Qdrant server (--url or QDRANT_URL); the embedded store always searches exactly")
+    client = make_client(url=args.url, api_key=settings.QDRANT_API_KEY)
+
+    if args.source_collection:
+        vectors = server_vectors(client, args.source_collection)
+        np.random.default_rng(0).shuffle(vectors)
+    else:
+        vectors = synthetic_vectors(args.points + args.queries, args.dim)
+    queries, corpus = vectors[:args.queries], vectors[args.queries:]
+    truth = exact_top_k(corpus, queries, args.top_k)
+    print(f"{len(corpus)} vectors x {corpus.shape[1]} dims, {len(queries)} queries, top_k={args.top_k}\n")
+
+    header = f"{'m':>4}{'ef_construct':>14}{'ef':>6}{'build s':>9}{'recall@k':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    print(header)
+    rows = []
+    for m in args.m:
+        for ef_construct in args.ef_construct:
+            name = f"tune_hnsw_m{m}_efc{ef_construct}"
+            seconds = build(client, name, corpus, m, ef_construct, args.indexing_threshold)
+            configs = [("exact", SearchParams(exact=True))] + [
+                (str(ef), search_params(client, "none", hnsw_ef=ef)) for ef in args.ef
+            ]
+            for label, params in configs:
+                result = measure(client, name, queries, args.top_k, params)
+                row = {
+                    "m": m, "ef_construct": ef_construct, "ef": label, "build": seconds,
+                    "recall": recall(result["found"], truth),
+                    "p50": np.percentile(result["latencies"], 50),
+                    "p95": np.percentile(result["latencies"], 95),
+                    "p99": np.percentile(result["latencies"], 99),
+                }
+                rows.append(row)
+                print(
+                    f"{m:>4}{ef_construct:>14}{label:>6}{seconds:>9.1f}{row['recall']:>10.3f}"
+                    f"{row['p50']:>9.2f}{row['p95']:>9.2f}{row['p99']:>9.2f}"
+                )
+            if not args.keep:
+                client.delete_collection(name)
+
+    candidates = [row for row in rows if row["ef"] != "exact" and row["recall"] >= args.target_recall]
+    if not candidates:
+        print(f"\nNo configuration reached recall {args.target_recall}; try larger --ef / --ef-construct / --m.")
+        return
+    best = min(candidates, key=lambda row: (row["p95"], row["m"], row["ef_construct"]))
+    print(
+        f"\nFastest configuration with recall >= {args.target_recall}: "
+        f"m={best['m']} ef_construct={best['ef_construct']} ef={best['ef']} "
+        f"(recall {best['recall']:.3f}, p95 {best['p95']:.2f} ms)\n"
+        f"  QDRANT_HNSW_M={best['m']}\n  QDRANT_HNSW_EF_CONSTRUCT={best['ef_construct']}\n  QDRANT_HNSW_EF={best['ef']}"
+    )
+    if args.apply and args.source_collection:
+        apply_index_config(client, args.source_collection, hnsw_m=best["m"], hnsw_ef_construct=best["ef_construct"])
+        print(
+            f"Applied m / ef_construct to '{args.source_collection}'. Persist QDRANT_HNSW_M, "
+            "QDRANT_HNSW_EF_CONSTRUCT and QDRANT_HNSW_EF in .env so a recreated collection and the search side use them."
+        )
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 from typing import TypedDict, Annotated, List, Literal, Optional, cast
-import traceback
 from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
 from langchain_core.prompts import (
     PromptTemplate,
@@ -8,10 +7,13 @@ from langchain_core.messages.base import BaseMessage
 from langgraph.graph import StateGraph, START, END
 from langgraph.prebuilt import ToolNode
 from langgraph.graph.message import add_messages
-from langgraph.checkpoint.memory import MemorySaver
+import threading
 
 from src.logger.logg import logs
+from src.logger.message_summary import MessageSummary
 from .utils import *
+from .checkpoint import SqliteCheckpointSaver
+from .compaction import compact_state, summary_context
 
 logger = logs("main.log")
 
@@ -23,6 +25,18 @@ clinical_tool_node = ToolNode(clinical_node_tools)
 class AgentState(TypedDict):
     messages: Annotated[List[BaseMessage], add_messages]
     user_inputs: Annotated[List[HumanMessage], add_messages]
+    summary: str
+
+def compaction_node(state: AgentState):
+    """
+    ---------------------------------------------      NODE 0      ---------------------------------------------
+    Keeps the conversation within the context budget: recent turns stay verbatim,
+    older turns and tool outputs are folded into `summary`
+    """
+    update = compact_state(state)
+    if "summary" in update:
+        logger.info("Folded older turns into the summary (%d lines)", len(update["summary"].splitlines()))
+    return update
 
 def reception_node(state: AgentState):     #[Humanmessage - > AIMessage -> ToolMessage -> AIMessage -> HumanMessage -> next agent]
     """
@@ -41,7 +55,7 @@ def reception_node(state: AgentState):     #[Humanmessage - > AIMessage -> ToolM
         
         has_tool_message = any(isinstance(m, ToolMessage) and m.name=='database_retriever_tool' for m in state["messages"])
         if has_tool_message:
-            print(f"data_retrieval_tool message was found {state['messages']}")
+            logger.debug("reception: discharge report present, state=%s", MessageSummary(state["messages"]))
             data_tool_message = next(
                 (m for m in state["messages"] if isinstance(m, ToolMessage) and m.name == 'database_retriever_tool'),
                 None
@@ -57,10 +71,8 @@ def reception_node(state: AgentState):     #[Humanmessage - > AIMessage -> ToolM
                 {"query": query.content, "discharge_report_content": data_tool_message.content}
                 )
                 
-                question_patient = instance_decision_llm.invoke(final_system_template)
-                            
-                print(f"tool message llm questions : {question_patient}")
-                print(f"full state messages till now : {state['messages']}")
+                question_patient = get_decision_llm().invoke(final_system_template)
+                logger.debug("reception: follow-up reply %s", MessageSummary([question_patient]))
 
                 return {"messages" : [question_patient]}
             
@@ -74,21 +86,17 @@ def reception_node(state: AgentState):     #[Humanmessage - > AIMessage -> ToolM
             {"query": query_text, "discharge_report_content": ""}
         )
         
-        context_retriever_answer = instance_decision_llm.invoke(final_system_template)
+        context_retriever_answer = get_decision_llm().invoke(final_system_template)
         logger.info("decision maker llm was successfully invoked")
         
         if isinstance(context_retriever_answer, AIMessage):
-            print("AIMessage content:", context_retriever_answer)
+            logger.debug("reception: reply %s, state=%s", MessageSummary([context_retriever_answer]), MessageSummary(state["messages"]))
         else:
-            print("Received non-AIMessage response;", repr(context_retriever_answer))
-
-        print(f"final system template : {final_system_template}")
-        print(f"test_new_template_reception : {state['messages']}")
+            logger.warning("reception: received non-AIMessage response of type %s", type(context_retriever_answer).__name__)
         return {"messages" : [context_retriever_answer]}
     
     except Exception as e:
         logger.exception("decision maker node can't be executed: %s", e)
-        print(traceback.format_exc())
 
 def clinical_node(state: AgentState):
     """
@@ -97,24 +105,24 @@ def clinical_node(state: AgentState):
     has 2 tools which can be used : web search and rag data tool which retrives relevant chunk of text from vectorstore
     """
     try:
-        print(f"all User_inputs till clinical_node {state['user_inputs']}")
-        
         query = next(
             (m for m in reversed(state["user_inputs"]) if isinstance(m, HumanMessage)),
             None  # default if no HumanMessage found
         )
         
-        logger.info("Entering clinical node")
+        logger.debug("Entering clinical node, user_inputs=%s", MessageSummary(state["user_inputs"]))
         
+        # extract query text
+        query_text = query.content if isinstance(query.content, str) else str(query.content)
         context_enhancer_prompt = PromptTemplate(
             input_variables=["queries", "retrieved_rag_data", "web_search_output"], template=clinical_llm_template
         )
         final_context_prompt = context_enhancer_prompt.invoke(
-            {"queries": query.content, "retrieved_rag_data": "", "web_search_output": ""}
+            {"queries": query_text + summary_context(state.get("summary")), "retrieved_rag_data": "", "web_search_output": ""}
         )
 
-        out = clinical_llm.invoke(final_context_prompt)
-        logger.info("clinical llm output is : %s", out)
+        out = get_clinical_llm().invoke(final_context_prompt)
+        logger.info("clinical llm output: %s", MessageSummary([out]))
         return {"messages": [out]}
     except Exception as e:
         logger.exception("Couldn't execute context enhancer node %s", e)
@@ -123,7 +131,7 @@ def should_continue(state: AgentState) -> Literal["data", "next_agent"]:
     """Function to decide what to do next"""
     messages = state["messages"]
     last_message = messages[-1]
-    print(f"the last message in should_continue is  : {last_message}")
+    logger.debug("should_continue: last message %s", MessageSummary([last_message]))
 
     # Check if there's a ToolMessage named "data_retriever_tool"
     has_data_retriever_tool = any(
@@ -133,7 +141,7 @@ def should_continue(state: AgentState) -> Literal["data", "next_agent"]:
 
     # Only check .tool_calls if the last message actually supports it
     if hasattr(last_message, "tool_calls") and last_message.tool_calls and not has_data_retriever_tool:
-        print("ENTERING LOOP")
+        logger.debug("should_continue: routing to data_retrieve_tool")
         return "data"
     else:
         return "next_agent"
@@ -142,22 +150,31 @@ def should_continue_clinical(state: AgentState) -> Optional[Literal["clinical_to
     """Function to decide what to do next."""
     messages = state["messages"]
     last_message = messages[-1]
-    print(f"should_continue states clinical : {state['messages']}")
+    logger.debug("should_continue_clinical: state=%s", MessageSummary(messages))
 
     # If the last message is a ToolMessage, it means the tool has already executed
     if isinstance(last_message, ToolMessage):
-        print("✅ Tool finished — returning to agent.")
         return "exit"
 
     # If the LLM just made a tool call, perform the tool action
     if hasattr(last_message, "tool_calls") and last_message.tool_calls:
-        print("ENTERING web_search / clinical_tools")
+        logger.debug("should_continue_clinical: routing to clinical_tools")
         return "clinical_tools"
 
     # Otherwise, end or move to next stage
     return "exit"
 
-memory = MemorySaver()
+_memory: Optional[SqliteCheckpointSaver] = None
+_memory_lock = threading.Lock()
+
+def get_checkpointer() -> SqliteCheckpointSaver:
+    """The process-wide checkpointer, opened when the first graph is compiled rather than at import."""
+    global _memory
+    if _memory is None:
+        with _memory_lock:
+            if _memory is None:
+                _memory = SqliteCheckpointSaver()
+    return _memory
 
 def graph():
     """
@@ -165,9 +182,11 @@ def graph():
     """
     graph = StateGraph(AgentState)
 
+    graph.add_node("compact", compaction_node)
     graph.add_node("reception", reception_node)
     graph.add_node("data_retrieve_tool", tool_node)
-    graph.add_edge(START, "reception")
+    graph.add_edge(START, "compact")
+    graph.add_edge("compact", "reception")
     graph.add_edge("data_retrieve_tool", "reception")
     graph.add_node("clinical_agent", clinical_node)
 
@@ -189,7 +208,6 @@ def graph():
             "exit" : END
         }
     )
-    print("returning output from clinical tools node!!")
     graph.add_edge("clinical_tools","clinical_agent")
-    chat = graph.compile(checkpointer=memory, interrupt_before=["clinical_agent"])
+    chat = graph.compile(checkpointer=get_checkpointer(), interrupt_before=["clinical_agent"])
     return chat
\ No newline at end of file
@@ -0,0 +1,143 @@
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, ToolMessage
+from langchain_core.messages.base import BaseMessage
+from typing import Any, Dict, List, Optional, Set
+
+from src.config import settings
+
+DATA_TOOL_NAME = "database_retriever_tool"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token); good enough for budgeting."""
+    return (len(text) + 3) // 4
+
+
+def message_text(message: BaseMessage) -> str:
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        content += " " + " ".join(f"{call['name']}({call['args']})" for call in tool_calls)
+    return content
+
+
+def message_tokens(message: BaseMessage) -> int:
+    return estimate_tokens(message_text(message))
+
+
+def truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]} ...[{len(text) - max_chars} chars truncated]"
+
+
+def summary_line(message: BaseMessage, max_chars: int = 300) -> str:
+    """One line of the rolling summary for a message that is folded out of the window."""
+    text = " ".join(message_text(message).split())
+    if isinstance(message, HumanMessage):
+        role = "User"
+    elif isinstance(message, ToolMessage):
+        role = f"Tool {message.name or 'output'}"
+    elif isinstance(message, AIMessage):
+        role = "Assistant"
+    else:
+        role = message.type.capitalize()
+    return f"- {role}: {truncate(text, max_chars)}"
+
+
+def split_turns(messages: List[BaseMessage]) -> List[List[BaseMessage]]:
+    """Group messages into turns, each starting at a HumanMessage."""
+    turns: List[List[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def _data_tool_ids(messages: List[BaseMessage]) -> Set[str]:
+    """Ids of the latest discharge-report ToolMessage and the AI message that requested it."""
+    tool_message = next(
+        (m for m in reversed(messages) if isinstance(m, ToolMessage) and m.name == DATA_TOOL_NAME),
+        None,
+    )
+    if tool_message is None:
+        return set()
+    ids = {tool_message.id}
+    for m in messages:
+        if isinstance(m, AIMessage) and any(call.get("id") == tool_message.tool_call_id for call in m.tool_calls):
+            ids.add(m.id)
+    return ids
+
+
+def compact_state(
+    state: Dict[str, Any],
+    token_budget: int = settings.CONTEXT_TOKEN_BUDGET,
+    keep_turns: int = settings.CONTEXT_KEEP_TURNS,
+    summary_tokens: int = settings.CONTEXT_SUMMARY_TOKENS,
+    tool_payload_chars: int = settings.CONTEXT_TOOL_PAYLOAD_CHARS,
+) -> Dict[str, Any]:
+    """
+    Return the state update that keeps `messages` within `token_budget`.
+
+    The newest turns (at most `keep_turns`, always the current one) stay verbatim;
+    older turns are removed and folded into `summary`, a list of one-line notes that
+    is itself capped at `summary_tokens` by dropping its oldest lines. The latest
+    discharge report and the first user input are always kept, since the reception
+    node reads both. Oversized outputs of other tools are truncated in place.
+    `user_inputs` keeps the first input plus the last `keep_turns`.
+    """
+    messages: List[BaseMessage] = state.get("messages", [])
+    user_inputs: List[BaseMessage] = state.get("user_inputs", [])
+    pinned = _data_tool_ids(messages)
+    update: Dict[str, Any] = {}
+
+    # shorten bulky tool payloads (web search, RAG passages); the discharge report is the prompt input itself
+    replaced: List[BaseMessage] = []
+    for m in messages:
+        if isinstance(m, ToolMessage) and m.id not in pinned and isinstance(m.content, str) \
+                and len(m.content) > tool_payload_chars:
+            replaced.append(m.model_copy(update={"content": truncate(m.content, tool_payload_chars)}))
+    if replaced:
+        by_id = {m.id: m for m in replaced}
+        messages = [by_id.get(m.id, m) for m in messages]
+
+    total = sum(message_tokens(m) for m in messages)
+    removed: List[BaseMessage] = []
+    if total > token_budget:
+        turns = split_turns(messages)
+        kept = 0
+        used = 0
+        for turn in reversed(turns):
+            turn_tokens = sum(message_tokens(m) for m in turn)
+            if kept >= 1 and (kept >= keep_turns or used + turn_tokens > token_budget):
+                break
+            kept += 1
+            used += turn_tokens
+        for turn in turns[:-kept]:
+            removed.extend(m for m in turn if m.id not in pinned)
+
+    if removed:
+        removed_ids = {m.id for m in removed}
+        replaced = [m for m in replaced if m.id not in removed_ids]
+
+        lines = [line for line in state.get("summary", "").splitlines() if line]
+        lines.extend(summary_line(m) for m in removed)
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > summary_tokens:
+            lines.pop(0)
+        update["summary"] = "\n".join(lines)
+        update["messages"] = [RemoveMessage(id=m.id) for m in removed]
+
+    if replaced:
+        update["messages"] = update.get("messages", []) + replaced
+
+    if len(user_inputs) > keep_turns + 1:
+        update["user_inputs"] = [RemoveMessage(id=m.id) for m in user_inputs[1:-keep_turns]]
+
+    return update
+
+
+def summary_context(summary: Optional[str]) -> str:
+    """Render the rolling summary for inclusion in a prompt ('' when there is none)."""
+    if not summary:
+        return ""
+    return f"\n\nEarlier in this conversation (summarized):\n{summary}"
@@ -0,0 +1,140 @@
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, Generation
+from collections import OrderedDict
+from typing import Any, Optional
+import hashlib
+import inspect
+import os
+import sqlite3
+import threading
+
+from src.config import settings
+from src.logger.logg import logs
+
+logger = logs("llm_cache.log")
+
+_ALLOWED_OBJECTS = [ChatGeneration, Generation, AIMessage]
+# `allowed_objects` only exists in newer langchain-core; older releases restrict
+# deserialization to the langchain namespaces by default
+_LOADS_KWARGS = {"allowed_objects": _ALLOWED_OBJECTS} if "allowed_objects" in inspect.signature(loads).parameters else {}
+
+
+def _fresh(generations: RETURN_VAL_TYPE) -> RETURN_VAL_TYPE:
+    """
+    Copies of cached generations without message ids.
+
+    Chat models stamp the run id on a response before caching it; handing the same id
+    out again would make add_messages overwrite the earlier reply instead of appending.
+    """
+    fresh = []
+    for gen in generations:
+        if isinstance(gen, ChatGeneration):
+            gen = gen.model_copy(update={"message": gen.message.model_copy(update={"id": None})})
+        fresh.append(gen)
+    return fresh
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Exact-match cache for chat model responses, plugged in through the model's `cache=` field.
+
+    LangChain keys every lookup by the serialized prompt messages and the model's
+    llm_string, which covers the model name, sampling parameters and bound tools.
+    Entries live in an in-memory LRU and, when `cache_path` is set, in a SQLite table
+    that survives restarts. Only use it with deterministic (temperature 0) models.
+    """
+
+    def __init__(self, max_items: int = 1024, cache_path: Optional[str] = None):
+        self.max_items = max_items
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[bytes, RETURN_VAL_TYPE]" = OrderedDict()
+        self.cache_path = cache_path
+        # opened on first lookup/update, so importing the agent touches no files
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _open(self, cache_path: str) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        db = sqlite3.connect(cache_path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("CREATE TABLE IF NOT EXISTS responses (key BLOB PRIMARY KEY, generations TEXT) WITHOUT ROWID")
+        db.commit()
+        logger.info("LLM response cache ready at %s", cache_path)
+        return db
+
+    def _database(self) -> Optional[sqlite3.Connection]:
+        """The SQLite connection, opened on first use; callers hold self._lock."""
+        if self._db is None and self.cache_path:
+            self._db = self._open(self.cache_path)
+        return self._db
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> bytes:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).digest()
+
+    def _remember(self, key: bytes, generations: RETURN_VAL_TYPE) -> None:
+        self._memory[key] = generations
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            generations = self._memory.get(key)
+            if generations is not None:
+                self._memory.move_to_end(key)
+            elif (db := self._database()) is not None:
+                row = db.execute("SELECT generations FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    try:
+                        generations = loads(row[0], **_LOADS_KWARGS)
+                        self._remember(key, generations)
+                    except Exception as e:
+                        logger.warning("Dropping unreadable cached LLM response: %s", e)
+            if generations is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return _fresh(generations)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if self.max_items <= 0:
+            return
+        key = self._key(prompt, llm_string)
+        generations = _fresh(return_val)
+        with self._lock:
+            self._remember(key, generations)
+            db = self._database()
+            if db is not None:
+                db.execute(
+                    "INSERT OR REPLACE INTO responses (key, generations) VALUES (?, ?)", (key, dumps(generations))
+                )
+                db.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        """Forget every cached response, in memory and on disk."""
+        with self._lock:
+            self._memory.clear()
+            db = self._database()
+            if db is not None:
+                db.execute("DELETE FROM responses")
+                db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            self.cache_path = None
+
+
+llm_cache = LLMResponseCache(
+    max_items=settings.LLM_CACHE_SIZE,
+    cache_path=settings.LLM_CACHE_PATH or None,
+)
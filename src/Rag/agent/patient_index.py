@@ -0,0 +1,136 @@
+from typing import Any, Dict, List, Optional, Set
+import json
+import os
+import re
+import threading
+import unicodedata
+
+from src.logger.logg import logs
+
+logger = logs("patient_index.log")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_name(name: str) -> str:
+    """Case-fold, unicode-normalize and collapse whitespace in a patient name."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", name).casefold()).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class PatientIndex:
+    """
+    In-memory index over the discharge report file.
+
+    The JSON file is parsed once and re-parsed only when its mtime changes. Lookups
+    are a dict hit on the normalized name; partial names are resolved through a
+    trigram index (substring matches) and a token index (all words present, any
+    order), so neither path scans every record.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._mtime: Optional[int] = None
+        self._records: List[Dict[str, Any]] = []
+        self._names: List[str] = []
+        self._by_name: Dict[str, List[int]] = {}
+        self._by_token: Dict[str, Set[int]] = {}
+        self._by_trigram: Dict[str, Set[int]] = {}
+
+    def _ensure_loaded(self) -> None:
+        try:
+            mtime = os.stat(self.file_path).st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {self.file_path}")
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime != self._mtime:
+                self._load()
+                self._mtime = mtime
+
+    def _load(self) -> None:
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        # normalize to a list of records
+        if isinstance(data, dict):
+            # if top-level is a dict but contains a list under common keys, try to use it
+            for candidate_key in ("reports", "patients", "records"):
+                if candidate_key in data and isinstance(data[candidate_key], list):
+                    records = data[candidate_key]
+                    break
+            else:
+                # otherwise wrap single dict into list
+                records = [data]
+        elif isinstance(data, list):
+            records = data
+        else:
+            raise ValueError("Unexpected JSON structure: expected list or dict.")
+
+        records = [rec for rec in records if isinstance(rec, dict)]
+        names = [normalize_name(str(rec.get("patient_name", ""))) for rec in records]
+
+        by_name: Dict[str, List[int]] = {}
+        by_token: Dict[str, Set[int]] = {}
+        by_trigram: Dict[str, Set[int]] = {}
+        for idx, name in enumerate(names):
+            by_name.setdefault(name, []).append(idx)
+            for token in name.split():
+                by_token.setdefault(token, set()).add(idx)
+            for gram in trigrams(name):
+                by_trigram.setdefault(gram, set()).add(idx)
+
+        # swap in the new index in one go so readers never see a partial build
+        self._records, self._names = records, names
+        self._by_name, self._by_token, self._by_trigram = by_name, by_token, by_trigram
+        logger.info("Indexed %d patient records from %s", len(records), self.file_path)
+
+    def _substring_matches(self, name: str) -> List[int]:
+        if len(name) < 3:
+            candidates = self._by_token.get(name, set())
+        else:
+            postings = [self._by_trigram.get(gram) for gram in trigrams(name)]
+            if not all(postings):
+                return []
+            candidates = set.intersection(*sorted(postings, key=len))
+        return sorted(idx for idx in candidates if name in self._names[idx])
+
+    def _token_matches(self, name: str) -> List[int]:
+        postings = [self._by_token.get(token) for token in name.split()]
+        if not postings or not all(postings):
+            return []
+        return sorted(set.intersection(*sorted(postings, key=len)))
+
+    def lookup(self, patient_name: str) -> Dict[str, Any]:
+        """
+        Return {"match": record} for a single hit, {"matches": [...]} for several,
+        or {"error": ...} when nothing matches.
+        """
+        self._ensure_loaded()
+        name_norm = normalize_name(patient_name)
+
+        # exact (case-insensitive) matches first, then partial names
+        hits = self._by_name.get(name_norm) or self._substring_matches(name_norm) or self._token_matches(name_norm)
+        if not hits:
+            return {"error": f"No records found for patient name '{patient_name}'."}
+
+        matches = [self._records[idx] for idx in hits]
+        return {"match": matches[0]} if len(matches) == 1 else {"matches": matches}
+
+
+_indexes: Dict[str, PatientIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_patient_index(file_path: str) -> PatientIndex:
+    """Return the process-wide index for `file_path`."""
+    index = _indexes.get(file_path)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.setdefault(file_path, PatientIndex(file_path))
+    return index
@@ -1,16 +1,32 @@
-from langchain_groq import ChatGroq
-from langchain_tavily import TavilySearch
-from langchain_core.tools import tool
-from typing import List, Dict, Union
-import json
-import os
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool, tool
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Dict, Optional, Tuple, Union
+import threading
 
 from src.config import settings
 from src.logger.logg import logs
-from src.Rag.retrieve import make_client, load_embed_model, get_vector_store
+from src.Rag.registry import registry
+from src.Rag.retrieval_cache import retrieval_cache
+from src.Rag.filters import SearchFilter
+from src.Rag.retrieve import fuse_hybrid, search_params, store_filter
+from src.Rag.sparse import SparseIndex
+from .patient_index import get_patient_index
+from .llm_cache import llm_cache
+from src.monitoring.metrics import (
+    RETRIEVAL_CACHE_HITS,
+    RETRIEVAL_EMBED_DURATION,
+    RETRIEVAL_RERANK_DURATION,
+    RETRIEVAL_RERANK_FALLBACKS,
+    RETRIEVAL_SEARCH_DURATION,
+    RETRIEVAL_SPARSE_DURATION,
+)
 
 logger = logs('utils.log')
 
+# runs the BM25 half of a hybrid search while the calling thread embeds and searches Qdrant
+_sparse_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="sparse-search")
+
 ###########################      Templates      ###########################
 
 reception_prompt_template = """
@@ -127,8 +143,14 @@ clinical_llm_template = """
 """
 
 ###########################      Tools      ###########################
+def _sparse_search(
+    index: SparseIndex, collection_name: str, query: str, limit: int, search_filter: Optional[SearchFilter]
+) -> List[Tuple[str, float]]:
+    with RETRIEVAL_SPARSE_DURATION.time(collection=collection_name):
+        return index.search(collection_name, query, limit, search_filter)
+
 @tool
-def database_retriever_tool(patient_name: str, file_path: str = r"D:\medicare\Data\reports.json") -> dict:
+def database_retriever_tool(patient_name: str, file_path: str = settings.PATIENT_REPORTS_PATH) -> dict:
     """
     Read a JSON file of patient discharge reports and return the record(s) that match `patient_name`.
 
@@ -145,43 +167,8 @@ def database_retriever_tool(patient_name: str, file_path: str = r"D:\medicare\Da
         if not isinstance(patient_name, str) or not patient_name.strip():
             return {"error": "patient_name must be a non-empty string."}
 
-        # check file exists
-        if not os.path.exists(file_path):
-            return {"error": f"File not found: {file_path}"}
-
-        # load json
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        # normalize to a list of records
-        if isinstance(data, dict):
-            # if top-level is a dict but contains a list under common keys, try to use it
-            for candidate_key in ("reports", "patients", "records"):
-                if candidate_key in data and isinstance(data[candidate_key], list):
-                    data_list = data[candidate_key]
-                    break
-            else:
-                # otherwise wrap single dict into list
-                data_list = [data]
-        elif isinstance(data, list):
-            data_list = data
-        else:
-            return {"error": "Unexpected JSON structure: expected list or dict."}
-
-        # normalize search name
-        name_norm = patient_name.strip().lower()
-
-        # exact (case-insensitive) matches
-        exact_matches = [
-            rec for rec in data_list
-            if isinstance(rec, dict) and rec.get("patient_name", "").strip().lower() == name_norm
-        ]
-
-        if exact_matches:
-            # return single entry if one, else return list under "matches"
-            return {"match" : exact_matches[0]} if len(exact_matches) == 1 else {"matches": exact_matches}
-        else:
-            return {"error": f"No records found for patient name '{patient_name}'."}
+        # indexed lookup; the file is only re-read when it changes on disk
+        return get_patient_index(file_path).lookup(patient_name)
 
     except Exception as e:
         return {"error": str(e)}
@@ -189,67 +176,176 @@ def database_retriever_tool(patient_name: str, file_path: str = r"D:\medicare\Da
 @tool
 def vector_retriever_tool(
     query: str,
-    collection_name: str = "Medicare",
+    collection_name: str = settings.QDRANT_COLLECTION_NAME,
     top_k: int = 5,
-    qdrant_path: str = r"D:\medicare\src\infrastructure",
+    qdrant_path: str = settings.QDRANT_PATH,
+    source: Optional[str] = None,
+    section: Optional[str] = None,
+    page_from: Optional[int] = None,
+    page_to: Optional[int] = None,
 ) -> Union[Dict[str, List[Dict]], Dict[str, str]]:
     """
     Tool which can retrive data stored in a database 
     takes arguments as query. 
+    optional filters narrow the search: source (book file name, comma-separated for several),
+    section (words that must all appear as whole words in the chapter/section heading, any order,
+    case-insensitive: "hyperkalemia" matches "2. Potassium > Hyperkalemia", "hyperkal" does not),
+    page_from / page_to (PDF page numbers, inclusive)
     returns relevant results
     
     """
     if not isinstance(query, str) or not query.strip():
         return {"error": "query must be a non-empty string."}
-
     try:
-        client = make_client(path=qdrant_path)
-        embeddings = load_embed_model()
-        vs = get_vector_store(client=client, collection_name=collection_name, embeddings=embeddings)
+        search_filter = SearchFilter.from_args(source, section, page_from, page_to)
+    except ValueError as exc:
+        return {"error": str(exc)}
 
-        # single clear search call (keeps it simple)
-        docs = vs.search(query, search_type="similarity", limit=top_k)
+    mode = settings.RETRIEVAL_MODE
+    rerank = settings.RERANK_ENABLED
+    # with reranking only the best RERANK_TOP_N passages reach the prompt
+    keep = min(top_k, settings.RERANK_TOP_N) if rerank else top_k
+    cache_key = retrieval_cache.make_key(
+        query, collection_name, top_k, qdrant_path, mode, keep if rerank else None, search_filter.key()
+    )
+    cached = retrieval_cache.get(cache_key)
+    if cached is not None:
+        logger.debug("Retrieval for collection=%r served from cache", collection_name)
+        RETRIEVAL_CACHE_HITS.inc(collection=collection_name)
+        return cached
+
+    try:
+        # shared, already-warm client / embeddings / store for this process
+        vs = registry.get_vector_store(collection_name=collection_name, path=qdrant_path)
+
+        # reranking over-fetches first-stage candidates for the cross-encoder to choose from
+        first_k = max(top_k, settings.RERANK_CANDIDATES) if rerank else top_k
+
+        # hybrid: BM25 runs concurrently, both retrievers over-fetch and RRF picks the first_k
+        sparse_future = None
+        dense_k = first_k
+        if mode == "hybrid":
+            dense_k = max(first_k, settings.HYBRID_CANDIDATES)
+            sparse_future = _sparse_pool.submit(
+                _sparse_search, registry.get_sparse_index(), collection_name, query, dense_k, search_filter
+            )
+
+        # embed and search separately so each step is timed on its own
+        with RETRIEVAL_EMBED_DURATION.time(collection=collection_name):
+            query_vector = vs.embeddings.embed_query(query)
+        with RETRIEVAL_SEARCH_DURATION.time(collection=collection_name):
+            # the filter is applied inside the search, on indexed payload fields
+            docs_and_scores = vs.similarity_search_with_score_by_vector(
+                query_vector,
+                k=dense_k,
+                filter=store_filter(vs, search_filter),
+                search_params=search_params(getattr(vs, "client", None)),
+            )
+
+        if sparse_future is not None:
+            try:
+                sparse_hits = sparse_future.result()
+            except Exception as exc:
+                # the dense ranking alone is still a useful answer
+                logger.warning("BM25 search for collection=%r failed, using dense results only: %s", collection_name, exc)
+                sparse_hits = []
+            docs_and_scores = fuse_hybrid(vs, docs_and_scores, sparse_hits, first_k)
+
+        reranked = False
+        if rerank:
+            reranker = registry.get_reranker()
+            if reranker is not None:
+                with RETRIEVAL_RERANK_DURATION.time(collection=collection_name):
+                    docs_and_scores, reranked = reranker.rerank(query, docs_and_scores, keep)
+            if not reranked:
+                RETRIEVAL_RERANK_FALLBACKS.inc(collection=collection_name)
+                docs_and_scores = docs_and_scores[:keep]
 
         matches = []
-        for doc in docs:
+        for doc, score in docs_and_scores:
             text = getattr(doc, "page_content", "") or ""
             meta = getattr(doc, "metadata", {}) or {}
-            score = getattr(doc, "score", None)
             citation = meta.get("source") or meta.get("filename") or meta.get("doc_id") or "unknown"
             matches.append({"text": text, "score": score, "citation": citation, "metadata": meta})
 
-        logger.info("Query=%r collection=%r returned %d matches", query, collection_name, len(matches))
-        return {"matches": matches}
+        # the query text may contain patient details, so only its size is logged
+        logger.info(
+            "Retrieval for collection=%r (query %d chars, %r) returned %d matches",
+            collection_name, len(query), search_filter, len(matches),
+        )
+        result = {"matches": matches}
+        # first-stage fallbacks are not cached, so the next ask gets a real rerank
+        if reranked or not rerank:
+            retrieval_cache.put(cache_key, result)
+        return result
 
     except Exception as exc:
         logger.exception("Error in vector_retriever_tool: %s", exc)
         return {"error": str(exc)}
 
-web_search_tool = TavilySearch(tavily_api_key=settings.TAVILY_API_KEY)
+@tool
+def web_search_tool(query: str, max_results: int = 5) -> Union[Dict[str, Any], Dict[str, str]]:
+    """
+    Tool which searches the web for medical literature
+    takes arguments as query and max_results (1-20, default 5).
+    returns ranked results with short snippets
+    use only when the local book has no answer
+
+    """
+    if not isinstance(query, str) or not query.strip():
+        return {"error": "query must be a non-empty string."}
+    try:
+        return get_web_search(max(1, min(int(max_results), 20))).invoke({"query": query})
+    except Exception as exc:
+        logger.exception("Error in web_search_tool: %s", exc)
+        return {"error": str(exc)}
 
 tools_reception = [database_retriever_tool]
 clinical_node_tools = [web_search_tool, vector_retriever_tool]
 
 ###########################      Models      ###########################
-
-decision_node_llm = ChatGroq(
-    model=settings.GROQ_LLM_MODEL,
-    temperature=0,
-    max_tokens=None,
-    reasoning_format="parsed",
-    timeout=None,
-    max_retries=2,
-    api_key=settings.GROQ_API_KEY,  # type: ignore
-)
-
-instance_decision_llm = decision_node_llm.bind_tools(tools=tools_reception)
-
-clinical_llm = ChatGroq(
-    model=settings.GROQ_LLM_MODEL,
-    temperature=0,
-    max_tokens=None,
-    reasoning_format="parsed",
-    timeout=None,
-    max_retries=2,
-    api_key=settings.GROQ_API_KEY,  # type: ignore
-).bind_tools(tools = clinical_node_tools)
\ No newline at end of file
+# Clients are built on first use (or by the backend warmup), not at import time,
+# so importing this module never pulls in langchain_groq / langchain_tavily.
+
+_lazy_objects: Dict[str, Any] = {}
+_lazy_lock = threading.Lock()
+
+def _lazy(name: str, factory: Callable[[], Any]) -> Any:
+    obj = _lazy_objects.get(name)
+    if obj is None:
+        with _lazy_lock:
+            obj = _lazy_objects.get(name)
+            if obj is None:
+                obj = _lazy_objects[name] = factory()
+    return obj
+
+def _chat_groq() -> Any:
+    from langchain_groq import ChatGroq
+
+    return ChatGroq(
+        model=settings.GROQ_LLM_MODEL,
+        temperature=0,
+        max_tokens=None,
+        reasoning_format="parsed",
+        timeout=None,
+        max_retries=2,
+        api_key=settings.GROQ_API_KEY,  # type: ignore
+        cache=llm_cache,
+    )
+
+def _tavily_search(max_results: int) -> BaseTool:
+    from langchain_tavily import TavilySearch
+
+    return TavilySearch(max_results=max_results, tavily_api_key=settings.TAVILY_API_KEY)
+
+def get_web_search(max_results: int = 5) -> BaseTool:
+    """The process-wide Tavily search client behind web_search_tool, one per result count."""
+    return _lazy(f"web_search:{max_results}", lambda: _tavily_search(max_results))
+
+def get_decision_llm() -> Runnable:
+    """The reception model, with the reception tools bound."""
+    return _lazy("decision_llm", lambda: _chat_groq().bind_tools(tools=tools_reception))
+
+def get_clinical_llm() -> Runnable:
+    """The clinical model, with web search and retrieval bound."""
+    return _lazy("clinical_llm", lambda: _chat_groq().bind_tools(tools=clinical_node_tools))
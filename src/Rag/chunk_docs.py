@@ -1,55 +1,40 @@
-from typing import List, Iterable
+from typing import List, Iterable, Iterator
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
 from src.logger.logg import logs
-from text_cleaner import clean_text
+from .text_cleaner import clean_string
 
 logger = logs("chunks.log")
 
-def chunking(
+def iter_chunks(
     documents: Iterable[Document],
     chunk_size: int = 1024,
     chunk_overlap: int = 256,
     do_clean: bool = True,
-) -> List[Document]:
+) -> Iterator[Document]:
     """
-    Partition documents into manageable chunks and assign a deterministic unique id
-    to each chunk (stored in chunk.metadata["id"]).
-    Steps:
-      1. Split documents into chunks.
-      2. Clean the chunk texts using clean_text (if do_clean=True).
-      3. Assign deterministic chunk ids and return cleaned chunks.
+    Streaming counterpart of `chunking`: consume pages one at a time and yield
+    cleaned chunks with the same deterministic ids ("source : page:idx").
+    Only the current page and its chunks are held in memory.
     """
-    try:
-        documents_list = list(documents)
-
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size, chunk_overlap=chunk_overlap
-        )
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    )
 
-        # 1) Split into raw chunks
-        chunks_docs = text_splitter.split_documents(documents_list)
-        logger.info("Number of chunks (raw): %d", len(chunks_docs))
+    last_page = None
+    current_chunk_idx = 0
+    for document in documents:
+        # 1) Split this page into raw chunks
+        chunks_docs = text_splitter.split_documents([document])
 
-        # 2) Clean the chunks (if desired)
+        # 2) Clean the chunks in place (if desired); the splitter's Documents are fresh
         if do_clean:
-            cleaned_chunks = clean_text(chunks_docs)
-            # sanity check: ensure we still have same number of chunks
-            if len(cleaned_chunks) != len(chunks_docs):
-                logger.warning(
-                    "clean_text changed number of chunks (%d -> %d). "
-                    "Proceeding with cleaned list.",
-                    len(chunks_docs),
-                    len(cleaned_chunks),
-                )
-            chunks_docs = cleaned_chunks
-        else:
-            logger.debug("Skipping cleaning of chunks")
+            for chunk in chunks_docs:
+                chunk.page_content = clean_string(chunk.page_content)
 
-        # 3) Assign deterministic ids
-        last_page = None
-        current_chunk_idx = 0
+        # 3) Assign deterministic ids; the index keeps counting while consecutive
+        #    chunks share a (source, page), exactly like the batch version
         for chunk in chunks_docs:
             source = chunk.metadata.get("source")
             page = chunk.metadata.get("page")
@@ -63,14 +48,34 @@ def chunking(
             else:
                 current_chunk_idx = 0
 
-            chunk_id = f"{current_page_id}:{current_chunk_idx}"
             # Ensure metadata dict exists (Document.metadata should already be a dict)
             if chunk.metadata is None:
                 chunk.metadata = {}
-            chunk.metadata["id"] = chunk_id
+            chunk.metadata["id"] = f"{current_page_id}:{current_chunk_idx}"
 
             last_page = current_page_id
+            yield chunk
 
+
+def chunking(
+    documents: Iterable[Document],
+    chunk_size: int = 1024,
+    chunk_overlap: int = 256,
+    do_clean: bool = True,
+) -> List[Document]:
+    """
+    Partition documents into manageable chunks and assign a deterministic unique id
+    to each chunk (stored in chunk.metadata["id"]).
+    Steps:
+      1. Split documents into chunks.
+      2. Clean the chunk texts using clean_string (if do_clean=True).
+      3. Assign deterministic chunk ids and return cleaned chunks.
+    Use `iter_chunks` to process large document sets in constant memory.
+    """
+    try:
+        if not do_clean:
+            logger.debug("Skipping cleaning of chunks")
+        chunks_docs = list(iter_chunks(documents, chunk_size, chunk_overlap, do_clean))
         logger.info("Number of chunks (final): %d", len(chunks_docs))
         return chunks_docs
 
@@ -1,32 +1,145 @@
 from langchain_community.document_loaders.pdf import PyPDFLoader
+from langchain_community.document_loaders.parsers.pdf import _purge_metadata
 from langchain_core.documents import Document
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from typing import Iterator, List, Optional, Tuple
+import os
 
+from src.config import settings
 from src.logger.logg import logs
 
 logger = logs("data.log")
 
 
-def pdf_loader(file_path: str) -> List[Document]:
+def _extract_page_range(file_path: str, start: int, end: int) -> List[Tuple[int, str, str]]:
     """
-    Loads a PDF file and returns its pages.
+    Worker for the process-pool mode: open the PDF and extract pages [start, end).
+    Returns (page number, page label, text) tuples, which are cheap to pickle back.
+    """
+    import pypdf
+
+    reader = pypdf.PdfReader(file_path)
+    labels = reader.page_labels
+    return [
+        (number, labels[number], reader.pages[number].extract_text(extraction_mode="plain").strip())
+        for number in range(start, end)
+    ]
+
+
+def _iter_pages_parallel(file_path: str, workers: int, pages_per_task: int) -> Iterator[Document]:
+    """
+    Split the page range across a process pool and yield pages in document order.
+    At most two tasks per worker are in flight, so extraction runs ahead of the
+    consumer without buffering the whole book. The document-level metadata (producer,
+    creator, creationdate, title...) is read once here and merged into every page the
+    way PyPDFLoader does, so both modes yield the same documents.
+    """
+    import pypdf
+
+    reader = pypdf.PdfReader(file_path)
+    total_pages = len(reader.pages)
+    doc_metadata = _purge_metadata(
+        {"producer": "PyPDF", "creator": "PyPDF", "creationdate": ""}
+        | dict(reader.metadata or {})
+        | {"source": file_path, "total_pages": total_pages}
+    )
+    ranges = deque(
+        (start, min(start + pages_per_task, total_pages))
+        for start in range(0, total_pages, pages_per_task)
+    )
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        while ranges or in_flight:
+            while ranges and len(in_flight) < workers * 2:
+                start, end = ranges.popleft()
+                in_flight.append(executor.submit(_extract_page_range, file_path, start, end))
+
+            for number, label, text in in_flight.popleft().result():
+                yield Document(
+                    page_content=text,
+                    metadata=doc_metadata | {"page": number, "page_label": label},
+                )
+
+
+def pdf_sections(file_path: str) -> List[Optional[str]]:
+    """
+    Section of every page from the PDF outline (bookmarks): the path of the last
+    heading that starts on or before the page, e.g. "Part II > 12. Hyperkalemia".
+    Pages before the first heading, and every page of a PDF without an outline, get None.
+    """
+    import pypdf
+
+    reader = pypdf.PdfReader(file_path)
+    sections: List[Optional[str]] = [None] * len(reader.pages)
+    starts: List[Tuple[int, str]] = []
+
+    def walk(items: list, parents: List[str]) -> None:
+        # pypdf nests a heading's children as a list right after the heading itself
+        title = None
+        for item in items:
+            if isinstance(item, list):
+                walk(item, parents + [title] if title else parents)
+                continue
+            title = str(item.title).strip()
+            page = reader.get_destination_page_number(item)
+            if title and page is not None and page >= 0:
+                starts.append((page, " > ".join(parents + [title])))
+
+    try:
+        walk(reader.outline, [])
+    except Exception as e:
+        logger.warning("Could not read the outline of %s, pages get no section: %s", file_path, e)
+        return sections
+
+    # stable sort: a chapter and its first subsection on the same page keep outline order
+    starts.sort(key=lambda start: start[0])
+    current, position = None, 0
+    for page in range(len(sections)):
+        while position < len(starts) and starts[position][0] <= page:
+            current = starts[position][1]
+            position += 1
+        sections[page] = current
+    return sections
+
+
+def iter_pdf_pages(
+    file_path: str,
+    workers: int = settings.PDF_LOADER_WORKERS,
+    pages_per_task: int = 32,
+) -> Iterator[Document]:
+    """
+    Lazily yield the pages of a PDF as they are extracted.
+
+    With workers <= 1 pages come from PyPDFLoader.lazy_load(). With more workers the
+    page range is split into blocks of `pages_per_task` pages that are extracted in a
+    process pool; pages are still yielded in order with source/page/page_label/
+    total_pages metadata, plus "section" from the PDF outline where it has one.
     """
+    if not os.path.exists(file_path):
+        logger.error("File not found: %s", file_path)
+        raise FileNotFoundError(f"File does not exist: {file_path}")
+
     try:
-        pages = []
-        loader = PyPDFLoader(file_path)
-        if not loader:
+        if workers <= 1:
+            pages = PyPDFLoader(file_path).lazy_load()
+        else:
+            pages = _iter_pages_parallel(file_path, workers, max(1, pages_per_task))
+
+        sections = pdf_sections(file_path)
+        count = 0
+        for page in pages:
+            count += 1
+            number = page.metadata.get("page")
+            if isinstance(number, int) and 0 <= number < len(sections) and sections[number]:
+                page.metadata["section"] = sections[number]
+            yield page
+
+        if count == 0:
             logger.error("No pages returned by PyPDFLoader for file: %s", file_path)
             raise Exception(f"No content loaded from PDF: {file_path}")
-        for page in loader.load():
-            pages.append(page)
-        logger.info(
-            "Successfully loaded PDF: %s -------------\n---------------\n", file_path
-        )
-        logger.info(
-            "Number of pages in the provided PDF: %d -------------\n---------------\n",
-            len(pages),
-        )
-        return pages
+        logger.info("Streamed %d pages from PDF: %s", count, file_path)
 
     except Exception as e:
         logger.exception(
@@ -36,6 +149,21 @@ def pdf_loader(file_path: str) -> List[Document]:
         raise
 
 
+def pdf_loader(file_path: str, workers: int = settings.PDF_LOADER_WORKERS) -> List[Document]:
+    """
+    Loads a PDF file and returns its pages.
+    """
+    pages = list(iter_pdf_pages(file_path, workers=workers))
+    logger.info(
+        "Successfully loaded PDF: %s -------------\n---------------\n", file_path
+    )
+    logger.info(
+        "Number of pages in the provided PDF: %d -------------\n---------------\n",
+        len(pages),
+    )
+    return pages
+
+
 if __name__ == "__main__":
     pass
 
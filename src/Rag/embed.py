@@ -1,31 +1,66 @@
-from langchain_huggingface.embeddings import HuggingFaceEmbeddings
-from typing import List
+from langchain_core.embeddings import Embeddings
+from typing import List, Optional
 
 from src.logger.logg import logs
 from src.config import settings
+from .embed_cache import CachedEmbeddings
 
 logger = logs("embed.log")
 
-def load_embed_model(model_name: str = settings.EMBEDDING_MODEL_NAME):
+def load_embed_model(
+    model_name: str = settings.EMBEDDING_MODEL_NAME,
+    cache_path: Optional[str] = settings.EMBEDDING_CACHE_PATH,
+    backend: str = settings.EMBEDDING_BACKEND,
+) -> Embeddings:
     """
-    Loads an embedding model from langchain hugging face module.
+    Loads an embedding model from langchain hugging face module, or its ONNX export.
     Args :
         model_name(default = all-MiniLM-L6-v2)
+        cache_path: SQLite file backing the embedding cache; empty/None disables caching.
+        backend: "torch" runs sentence-transformers; "onnx" runs the (int8 with
+            ONNX_QUANTIZE) ONNX export through ONNX Runtime and never imports torch;
+            it needs the "onnx" extra (uv sync --extra onnx).
     """
 
-    embedding_model = HuggingFaceEmbeddings(model_name=model_name)
-    logger.info("Embedding Model successfully loaded: %s", model_name)
-
+    if backend == "onnx":
+        from .onnx_embed import load_onnx_embeddings
+
+        embedding_model = load_onnx_embeddings(model_name, quantize=settings.ONNX_QUANTIZE)
+        # vectors of different backends differ slightly, so they must not share cache entries
+        cache_model_name = f"{model_name}@onnx-{'int8' if settings.ONNX_QUANTIZE else 'fp32'}"
+    elif backend == "torch":
+        from langchain_huggingface.embeddings import HuggingFaceEmbeddings
+
+        embedding_model = HuggingFaceEmbeddings(model_name=model_name)
+        cache_model_name = model_name
+    else:
+        raise ValueError(
+            f"Unknown embedding backend: {backend!r} (expected 'torch' or 'onnx'; 'onnx' needs the \"onnx\" extra)"
+        )
+    logger.info("Embedding Model successfully loaded: %s (%s backend)", model_name, backend)
+
+    if cache_path:
+        return CachedEmbeddings(
+            embedding_model,
+            model_name=cache_model_name,
+            cache_path=cache_path,
+            max_memory_items=settings.EMBEDDING_CACHE_MEMORY_ITEMS,
+        )
     return embedding_model
 
 
 def embed_chunks(
-    chunks: str, model: HuggingFaceEmbeddings = load_embed_model()
+    chunks: str, model: Optional[Embeddings] = None
 ) -> List[List[float]]:
     """
     Converts text to vector embeddings using the specified model.
+    The default model is loaded on first use, not when this module is imported.
     """
     try:
+        if model is None:
+            from .registry import registry
+            model = registry.get_embeddings()
+
         if not chunks or not isinstance(chunks, str):
             raise ValueError("Input 'chunks' must be a non-empty string")
 
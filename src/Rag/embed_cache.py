@@ -0,0 +1,169 @@
+from langchain_core.embeddings import Embeddings
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+import numpy as np
+
+from src.logger.logg import logs
+
+logger = logs("embed_cache.log")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalize and collapse whitespace so trivially different copies share a key."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that remembers every vector it has produced.
+
+    Lookups go through an in-memory LRU first and an on-disk SQLite store second;
+    only texts missing from both reach the wrapped model. Entries are keyed by
+    (model name, kind, hash of the normalized text) and stored as float32 blobs.
+    The store records the model it was built with and is wiped automatically when
+    opened with a different model name.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        cache_path: Optional[str] = None,
+        max_memory_items: int = 10000,
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_memory_items = max_memory_items
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        if cache_path:
+            self._db = self._open(cache_path)
+
+    def _open(self, cache_path: str) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        db = sqlite3.connect(cache_path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        db.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB) WITHOUT ROWID")
+
+        row = db.execute("SELECT value FROM meta WHERE key = 'model_name'").fetchone()
+        if row is None or row[0] != self.model_name:
+            if row is not None:
+                logger.info(
+                    "Embedding model changed (%s -> %s), clearing cache %s", row[0], self.model_name, cache_path
+                )
+            db.execute("DELETE FROM embeddings")
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('model_name', ?)", (self.model_name,))
+        db.commit()
+        logger.info("Embedding cache ready at %s", cache_path)
+        return db
+
+    def _key(self, text: str, kind: str) -> bytes:
+        payload = f"{self.model_name}\x00{kind}\x00{normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).digest()
+
+    def _remember(self, key: bytes, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Return cached vectors for `keys`, checking memory first and then disk."""
+        found: Dict[bytes, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+
+            missing = [key for key in dict.fromkeys(keys) if key not in found]
+            if self._db is not None and missing:
+                # stay well below SQLite's bound-parameter limit
+                for start in range(0, len(missing), 500):
+                    part = missing[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                        part,
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float32)
+                        self._remember(key, vector)
+                        found[key] = vector
+        return found
+
+    def _store(self, items: Dict[bytes, np.ndarray]) -> None:
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+            if self._db is not None and items:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, vector.tobytes()) for key, vector in items.items()],
+                )
+                self._db.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text, "doc") for text in texts]
+        found = self._lookup(keys)
+
+        # embed each distinct missing text once
+        pending: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in pending:
+                pending[key] = text
+
+        self.hits += len(texts) - len(pending)
+        self.misses += len(pending)
+
+        if pending:
+            vectors = self.embeddings.embed_documents(list(pending.values()))
+            computed = {
+                key: np.asarray(vector, dtype=np.float32)
+                for key, vector in zip(pending.keys(), vectors)
+            }
+            self._store(computed)
+            found.update(computed)
+
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text, "query")
+        found = self._lookup([key])
+        if key in found:
+            self.hits += 1
+            return found[key].tolist()
+
+        self.misses += 1
+        vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        self._store({key: vector})
+        return vector.tolist()
+
+    def clear(self) -> None:
+        """Forget every cached vector, in memory and on disk."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM embeddings")
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,164 @@
+from qdrant_client.models import (
+    FieldCondition,
+    Filter,
+    MatchAny,
+    MatchText,
+    PayloadSchemaType,
+    Range,
+    TextIndexParams,
+    TextIndexType,
+    TokenizerType,
+)
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+import json
+import re
+import sqlite3
+
+# Structured payload fields written next to page_content/metadata on every point.
+# Qdrant gets a payload index for each, so filters on them never scan the collection.
+# The section index uses Qdrant's word tokenizer; section_words mirrors it for the
+# BM25 and flat indexes, so a section filter matches the same chunks everywhere.
+PAYLOAD_INDEXES: Dict[str, Union[PayloadSchemaType, TextIndexParams]] = {
+    "source": PayloadSchemaType.KEYWORD,
+    "page": PayloadSchemaType.INTEGER,
+    "section": TextIndexParams(type=TextIndexType.TEXT, tokenizer=TokenizerType.WORD, lowercase=True),
+}
+
+
+def source_name(source: Any) -> Optional[str]:
+    """File name of a chunk's source path, separator-agnostic so Windows paths work everywhere."""
+    if not source:
+        return None
+    return re.split(r"[\\/]", str(source))[-1]
+
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def section_words(text: Optional[str]) -> List[str]:
+    """Lowercase words of a section heading or query, split like Qdrant's word tokenizer."""
+    return [word.lower() for word in _WORD.findall(text or "")]
+
+
+def section_matches(section: Optional[str], query: str) -> bool:
+    """Whether every word of `query` is a whole word of `section` (any order, case-insensitive)."""
+    words = section_words(query)
+    return bool(words) and set(words) <= set(section_words(section))
+
+
+def register_sql_functions(db: sqlite3.Connection) -> None:
+    """Make section_matches callable from the SQL that SearchFilter.sql produces."""
+    db.create_function("section_matches", 2, section_matches, deterministic=True)
+
+
+def payload_fields(metadata: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    The filterable fields of a chunk: "source" (PDF file name), "page" (1-based page
+    number in the PDF) and "section" (outline path of the page, e.g.
+    "Part II > 12. Hyperkalemia"). Missing values are None.
+    """
+    page = metadata.get("page")
+    return {
+        "source": source_name(metadata.get("source")),
+        "page": int(page) + 1 if isinstance(page, int) else None,
+        "section": metadata.get("section") or None,
+    }
+
+
+class SearchFilter:
+    """
+    Scope of a retrieval: any of `sources`, pages `page_from`..`page_to` (inclusive,
+    1-based) and a `section` heading containing every word of the given text as a
+    whole word, in any order and case-insensitive ("potassium" matches
+    "Part I > 2. Potassium", "potass" does not). Empty criteria are ignored; a filter
+    without criteria is falsy and matches everything.
+
+    The same filter is pushed down into every backend: a Qdrant `Filter` over the
+    indexed payload fields, an SQL clause for the BM25 index and a row mask for the
+    flat index.
+    """
+
+    def __init__(
+        self,
+        sources: Iterable[str] = (),
+        section: Optional[str] = None,
+        page_from: Optional[int] = None,
+        page_to: Optional[int] = None,
+    ):
+        self.sources: Tuple[str, ...] = tuple(sorted({source_name(s) for s in sources if s and s.strip()}))
+        self.section = section.strip() if section and section.strip() else None
+        self.page_from = page_from
+        self.page_to = page_to
+        if self.section and not section_words(self.section):
+            raise ValueError(f"section {self.section!r} contains no words to match")
+        if page_from is not None and page_to is not None and page_from > page_to:
+            raise ValueError(f"page_from ({page_from}) is after page_to ({page_to})")
+
+    @classmethod
+    def from_args(
+        cls,
+        source: Union[str, Sequence[str], None] = None,
+        section: Optional[str] = None,
+        page_from: Optional[int] = None,
+        page_to: Optional[int] = None,
+    ) -> "SearchFilter":
+        """Build from tool arguments; `source` may be a comma-separated list of file names."""
+        if isinstance(source, str):
+            source = source.split(",")
+        return cls([s.strip() for s in source or ()], section, page_from, page_to)
+
+    def __bool__(self) -> bool:
+        return bool(self.sources or self.section or self.page_from is not None or self.page_to is not None)
+
+    def __repr__(self) -> str:
+        return f"SearchFilter({self.key()})"
+
+    def key(self) -> str:
+        """Stable text form; part of the retrieval cache key."""
+        words = sorted(set(section_words(self.section))) or None
+        return json.dumps([self.sources, words, self.page_from, self.page_to])
+
+    def to_qdrant(self) -> Optional[Filter]:
+        if not self:
+            return None
+        conditions: List[FieldCondition] = []
+        if self.sources:
+            conditions.append(FieldCondition(key="source", match=MatchAny(any=list(self.sources))))
+        if self.page_from is not None or self.page_to is not None:
+            conditions.append(FieldCondition(key="page", range=Range(gte=self.page_from, lte=self.page_to)))
+        if self.section:
+            conditions.append(FieldCondition(key="section", match=MatchText(text=self.section)))
+        return Filter(must=conditions)
+
+    def sql(self, alias: str) -> Tuple[str, List[Any]]:
+        """
+        WHERE fragment (starting with AND) over the source/page/section columns of `alias`;
+        the connection needs register_sql_functions for the section test.
+        """
+        clauses, params = [], []
+        if self.sources:
+            clauses.append(f"{alias}.source IN ({','.join('?' * len(self.sources))})")
+            params.extend(self.sources)
+        if self.page_from is not None:
+            clauses.append(f"{alias}.page >= ?")
+            params.append(self.page_from)
+        if self.page_to is not None:
+            clauses.append(f"{alias}.page <= ?")
+            params.append(self.page_to)
+        if self.section:
+            clauses.append(f"section_matches({alias}.section, ?)")
+            params.append(self.section)
+        return "".join(f" AND {clause}" for clause in clauses), params
+
+    def matches(self, fields: Mapping[str, Any]) -> bool:
+        """Whether a point with these payload fields is in scope."""
+        if self.sources and fields.get("source") not in self.sources:
+            return False
+        page = fields.get("page")
+        if self.page_from is not None and (page is None or page < self.page_from):
+            return False
+        if self.page_to is not None and (page is None or page > self.page_to):
+            return False
+        if self.section and not section_matches(fields.get("section"), self.section):
+            return False
+        return True
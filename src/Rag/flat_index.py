@@ -0,0 +1,280 @@
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from qdrant_client import QdrantClient
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import argparse
+import json
+import os
+import threading
+import uuid
+
+import numpy as np
+
+from src.config import settings
+from src.logger.logg import logs
+from .filters import SearchFilter, payload_fields
+
+logger = logs("flat_index.log")
+
+CURRENT_FILE = "current.json"
+
+# vectors, payloads, row of each point id and the filter masks of one index version
+_IndexState = Tuple[np.ndarray, List[Dict[str, Any]], Dict[str, int], Dict[str, np.ndarray]]
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores along the last axis, best first (argpartition, then sort only k)."""
+    k = min(k, scores.shape[-1])
+    if k <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+    top = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=-1), axis=-1)
+    return np.take_along_axis(top, order, axis=-1)
+
+
+def write_flat_index(
+    directory: str,
+    collection_name: str,
+    ids: Sequence[str],
+    vectors: np.ndarray,
+    payloads: Sequence[Dict[str, Any]],
+) -> str:
+    """
+    Write one collection as `<directory>/<collection>/vectors.<version>.npy` (normalized
+    float32) plus `payloads.<version>.json`, then switch `current.json` to the new
+    version atomically, so readers never see a half-written index. The version that was
+    current until now is kept, because a reader may have read `current.json` but not yet
+    opened its files; older versions are deleted where possible (files a reader still
+    maps on Windows go with a later export).
+    """
+    target = os.path.join(directory, collection_name)
+    os.makedirs(target, exist_ok=True)
+    version = uuid.uuid4().hex
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    matrix = _normalize(matrix.reshape(len(ids), -1)) if len(ids) else matrix.reshape(0, 0)
+    np.save(os.path.join(target, f"vectors.{version}.npy"), matrix)
+    with open(os.path.join(target, f"payloads.{version}.json"), "w", encoding="utf-8") as f:
+        json.dump([{"id": str(point_id), **payload} for point_id, payload in zip(ids, payloads)], f)
+
+    current_path = os.path.join(target, CURRENT_FILE)
+    try:
+        with open(current_path, "r", encoding="utf-8") as f:
+            previous = json.load(f)["version"]
+    except (OSError, ValueError, KeyError):
+        previous = None
+    keep = {version, previous}
+
+    tmp_path = os.path.join(target, f"{CURRENT_FILE}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "count": len(ids), "dim": int(matrix.shape[1]) if len(ids) else 0}, f)
+    os.replace(tmp_path, current_path)
+
+    for name in os.listdir(target):
+        if name.startswith(("vectors.", "payloads.")) and name.split(".")[1] not in keep:
+            try:
+                os.remove(os.path.join(target, name))
+            except OSError:
+                pass
+    logger.info("Flat index for '%s' written: %d vectors (version %s)", collection_name, len(ids), version)
+    return version
+
+
+def export_collection(client: QdrantClient, collection_name: str, directory: str = settings.FLAT_INDEX_DIR) -> int:
+    """Copy every point (vector and payload) of a Qdrant collection into a flat index. Returns the point count."""
+    ids: List[str] = []
+    vectors: List[List[float]] = []
+    payloads: List[Dict[str, Any]] = []
+    offset = None
+    while True:
+        points, offset = client.scroll(collection_name, limit=1024, offset=offset, with_vectors=True, with_payload=True)
+        for point in points:
+            ids.append(str(point.id))
+            vectors.append(point.vector)  # type: ignore[arg-type]
+            payloads.append(point.payload or {})
+        if offset is None:
+            break
+    write_flat_index(directory, collection_name, ids, np.asarray(vectors, dtype=np.float32), payloads)
+    return len(ids)
+
+
+class FlatVectorStore(VectorStore):
+    """
+    Read-only vector store over a flat index written by `write_flat_index`.
+
+    The vector matrix is opened with `np.load(mmap_mode="r")`, so every process serving
+    the same index shares one copy in the OS page cache and nothing is copied into
+    Python objects; a query is one matrix-vector product plus argpartition. Unlike
+    local Qdrant it takes no lock, so any number of workers can read it. The index is
+    re-opened when `current.json` changes, i.e. after the next export.
+    A SearchFilter (`filter=`) is applied before scoring: its row mask over the
+    payload fields is computed once per filter and index version, and only the rows
+    in scope are multiplied.
+    Documents look like QdrantVectorStore's: the payload text and metadata with "_id"
+    (the Qdrant point id) and "_collection_name" added.
+    """
+
+    CONTENT_KEY = "page_content"
+    METADATA_KEY = "metadata"
+
+    def __init__(self, directory: str, collection_name: str, embedding: Embeddings):
+        self.directory = os.path.join(directory, collection_name)
+        self.collection_name = collection_name
+        self.embedding = embedding
+        self._lock = threading.Lock()
+        self._mtime: Optional[int] = None
+        # (vectors, payloads, row of each point id, filter key -> rows in scope), swapped as
+        # a whole on reload so a filter mask is only ever used with the rows it was built on
+        self._state: _IndexState = (np.empty((0, 0), np.float32), [], {}, {})
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def _index(self) -> _IndexState:
+        current = os.path.join(self.directory, CURRENT_FILE)
+        mtime = os.stat(current).st_mtime_ns
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    with open(current, "r", encoding="utf-8") as f:
+                        version = json.load(f)["version"]
+                    vectors = np.load(os.path.join(self.directory, f"vectors.{version}.npy"), mmap_mode="r")
+                    with open(os.path.join(self.directory, f"payloads.{version}.json"), "r", encoding="utf-8") as f:
+                        payloads = json.load(f)
+                    self._state = (vectors, payloads, {payload["id"]: row for row, payload in enumerate(payloads)}, {})
+                    self._mtime = mtime
+                    logger.info("Flat index '%s' opened: %d vectors (version %s)", self.collection_name, len(payloads), version)
+        return self._state
+
+    def __len__(self) -> int:
+        return len(self._index()[1])
+
+    def _document(self, payload: Dict[str, Any]) -> Document:
+        metadata = dict(payload.get(self.METADATA_KEY) or {})
+        metadata["_id"] = payload["id"]
+        metadata["_collection_name"] = self.collection_name
+        return Document(page_content=payload.get(self.CONTENT_KEY, ""), metadata=metadata)
+
+    def _scope(
+        self, search_filter: SearchFilter, payloads: List[Dict[str, Any]], scopes: Dict[str, np.ndarray]
+    ) -> np.ndarray:
+        """Rows of `payloads` in scope, cached in `scopes`, the mask cache of the same index version."""
+        key = search_filter.key()
+        rows = scopes.get(key)
+        if rows is None:
+            rows = np.flatnonzero([search_filter.matches(payload) for payload in payloads])
+            with self._lock:
+                if len(scopes) >= 64:
+                    scopes.pop(next(iter(scopes)))
+                scopes[key] = rows
+        return rows
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[SearchFilter] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Cosine top-k for one query vector. Extra Qdrant arguments (e.g. search_params) are ignored."""
+        return self.similarity_search_with_score_by_vectors([embedding], k, filter)[0]
+
+    def similarity_search_with_score_by_vectors(
+        self, embeddings: Sequence[List[float]], k: int = 4, filter: Optional[SearchFilter] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """Cosine top-k for a batch of query vectors with a single matrix product."""
+        vectors, payloads, _, scopes = self._index()
+        if not len(payloads) or not len(embeddings):
+            return [[] for _ in embeddings]
+        queries = _normalize(np.asarray(embeddings, dtype=np.float32))
+        if filter:
+            scope = self._scope(filter, payloads, scopes)
+            scores = queries @ vectors[scope].T
+            columns = _top_k(scores, k)
+            rows = scope[columns]
+        else:
+            scores = queries @ vectors.T
+            rows = columns = _top_k(scores, k)
+        return [
+            [(self._document(payloads[row]), float(scores[i, column])) for row, column in zip(query_rows, query_columns)]
+            for i, (query_rows, query_columns) in enumerate(zip(rows, columns))
+        ]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[SearchFilter] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, filter)
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[SearchFilter] = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[SearchFilter] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def batch_search(
+        self, queries: Sequence[str], k: int = 4, filter: Optional[SearchFilter] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """Embed and search several queries at once."""
+        return self.similarity_search_with_score_by_vectors(self.embedding.embed_documents(list(queries)), k, filter)
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        _, payloads, rows, _ = self._index()
+        return [self._document(payloads[rows[str(i)]]) for i in ids if str(i) in rows]
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[str]:
+        """The flat index is write-once: add to the Qdrant collection, then re-export it."""
+        raise RuntimeError(
+            f"The flat index of '{self.collection_name}' is read-only; ingest into Qdrant and re-export "
+            "with export_collection (or build a new one with FlatVectorStore.from_texts)"
+        )
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[Sequence[str]] = None,
+        directory: str = settings.FLAT_INDEX_DIR,
+        collection_name: str = settings.QDRANT_COLLECTION_NAME,
+        **kwargs: Any,
+    ) -> "FlatVectorStore":
+        """
+        Embed `texts` and write them as a new version of the flat index
+        `<directory>/<collection_name>`, replacing its previous contents. Payloads get
+        the same layout as ingested Qdrant points, including the filter fields; points
+        without `ids` get random ones.
+        """
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = [str(i) for i in ids] if ids is not None else [uuid.uuid4().hex for _ in texts]
+        if not len(texts) == len(metadatas) == len(ids):
+            raise ValueError("texts, metadatas and ids must have the same length")
+        vectors = np.asarray(embedding.embed_documents(texts) if texts else [], dtype=np.float32)
+        payloads = [
+            {cls.CONTENT_KEY: text, cls.METADATA_KEY: metadata, **payload_fields(metadata)}
+            for text, metadata in zip(texts, metadatas)
+        ]
+        write_flat_index(directory, collection_name, ids, vectors, payloads)
+        return cls(directory, collection_name, embedding)
+
+
+if __name__ == '__main__':
+    from .retrieve import make_client
+
+    parser = argparse.ArgumentParser(description="Export a Qdrant collection into a memory-mapped flat index.")
+    parser.add_argument("--collection", default=settings.QDRANT_COLLECTION_NAME)
+    parser.add_argument("--qdrant-path", default=settings.QDRANT_PATH)
+    parser.add_argument("--out", default=settings.FLAT_INDEX_DIR)
+    args = parser.parse_args()
+
+    client = make_client(path=args.qdrant_path)
+    count = export_collection(client, args.collection, args.out)
+    client.close()
+    print(f"Exported {count} vectors of '{args.collection}' to {os.path.join(args.out, args.collection)}")
@@ -1,84 +1,405 @@
-from qdrant_client.models import Distance, VectorParams
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Disabled,
+    Distance,
+    Filter,
+    HnswConfigDiff,
+    IsEmptyCondition,
+    OptimizersConfigDiff,
+    PayloadField,
+    PointIdsList,
+    PointStruct,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    VectorParams,
+)
 from langchain_qdrant import QdrantVectorStore
 from qdrant_client import QdrantClient
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from typing import List, Dict, Optional, Sequence, Set, Tuple, Union
+from tqdm import tqdm
+import argparse
+import json
+import os
+import time
+import uuid
+
+from src.config import settings
+from src.logger.logg import logs
+from .data import iter_pdf_pages
+from .chunk_docs import iter_chunks
+from .registry import registry
+from .manifest import IngestManifest
+from .retrieval_cache import bump_index_version
+from .sparse import SparseIndex
+from .retrieve import is_local
+from .flat_index import export_collection
+from .filters import PAYLOAD_INDEXES, payload_fields
+
+logger = logs("ingest.log")
+
+# Fixed namespace so the same chunk id always maps to the same Qdrant point id
+CHUNK_ID_NAMESPACE = uuid.UUID("7b0e6c2e-3f4a-4c1d-9a51-6d2f0e8b9c47")
+
+
+def point_id(chunk_id: str) -> str:
+    """Map a deterministic chunk id ("source : page:idx") to a stable Qdrant point UUID."""
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, chunk_id))
+
+
+def quantization_config(quantization: str) -> Optional[Union[ScalarQuantization, BinaryQuantization]]:
+    """
+    Qdrant quantization config for "scalar" (int8, ~4x less vector RAM) or "binary"
+    (1 bit per dimension, ~32x less); None for "none". Quantized vectors stay in RAM.
+    """
+    if quantization == "none":
+        return None
+    if quantization == "scalar":
+        return ScalarQuantization(scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True))
+    if quantization == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    raise ValueError(f"Unknown quantization {quantization!r}; expected 'none', 'scalar' or 'binary'")
+
+
+def ensure_collection(
+    client: QdrantClient,
+    collection_name: str,
+    vector_size: int,
+    quantization: Optional[str] = None,
+    originals_on_disk: bool = settings.QDRANT_ORIGINALS_ON_DISK,
+    hnsw_m: Optional[int] = None,
+    hnsw_ef_construct: Optional[int] = None,
+    indexing_threshold_kb: Optional[int] = settings.QDRANT_INDEXING_THRESHOLD_KB,
+) -> None:
+    """
+    Create the collection with cosine distance if it does not exist yet.
+
+    The HNSW graph is built with `hnsw_m` links per node and `hnsw_ef_construct`
+    candidates per insert (default QDRANT_HNSW_M / QDRANT_HNSW_EF_CONSTRUCT); `indexing_threshold_kb` sets the segment size from which
+    Qdrant builds that graph at all (smaller segments are scanned exactly).
+
+    A new collection is quantized with `quantization` (default QDRANT_QUANTIZATION); its
+    original float32 vectors can live on disk (`originals_on_disk`), read back only to
+    rescore the oversampled candidates. An existing collection is passed to
+    apply_index_config instead, so its quantization and HNSW parameters only change when
+    they are given; the embedded store ignores quantization and HNSW.
+    Either way the payload indexes for filtered search are created if missing.
+    """
+    if not client.collection_exists(collection_name):
+        quantization = quantization or settings.QDRANT_QUANTIZATION
+        hnsw_m = settings.QDRANT_HNSW_M if hnsw_m is None else hnsw_m
+        hnsw_ef_construct = settings.QDRANT_HNSW_EF_CONSTRUCT if hnsw_ef_construct is None else hnsw_ef_construct
+        config = quantization_config(quantization)
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=VectorParams(
+                size=vector_size,
+                distance=Distance.COSINE,
+                on_disk=originals_on_disk if config is not None else None,
+            ),
+            hnsw_config=HnswConfigDiff(m=hnsw_m, ef_construct=hnsw_ef_construct),
+            optimizers_config=(
+                OptimizersConfigDiff(indexing_threshold=indexing_threshold_kb)
+                if indexing_threshold_kb is not None else None
+            ),
+            quantization_config=config,
+        )
+        logger.info(
+            "Created collection '%s' (vector size %d, quantization %s, hnsw m=%d ef_construct=%d)",
+            collection_name, vector_size, quantization, hnsw_m, hnsw_ef_construct,
+        )
+        if config is not None and is_local(client):
+            logger.warning("The embedded Qdrant store ignores quantization; set QDRANT_URL to use it")
+        ensure_payload_indexes(client, collection_name)
+        return
+    apply_index_config(client, collection_name, quantization, hnsw_m, hnsw_ef_construct)
+    ensure_payload_indexes(client, collection_name)
+
+
+def apply_index_config(
+    client: QdrantClient,
+    collection_name: str,
+    quantization: Optional[str] = None,
+    hnsw_m: Optional[int] = None,
+    hnsw_ef_construct: Optional[int] = None,
+) -> None:
+    """
+    Bring an existing collection on a Qdrant server to the requested quantization and
+    HNSW parameters; Qdrant re-quantizes and rebuilds the graph in the background.
+    Parameters left at None keep the collection's current value, so ingesting into a
+    collection tuned with benchmarks/tune_hnsw.py --apply does not undo the tuning.
+    """
+    if is_local(client):
+        return
+    info = client.get_collection(collection_name).config
+    current = info.quantization_config
+    current_mode = "scalar" if getattr(current, "scalar", None) else "binary" if getattr(current, "binary", None) else "none"
+    if quantization is not None and current_mode != quantization:
+        client.update_collection(
+            collection_name=collection_name, quantization_config=quantization_config(quantization) or Disabled.DISABLED
+        )
+        logger.info("Quantization of '%s' changed from %s to %s", collection_name, current_mode, quantization)
+    hnsw_m = info.hnsw_config.m if hnsw_m is None else hnsw_m
+    hnsw_ef_construct = info.hnsw_config.ef_construct if hnsw_ef_construct is None else hnsw_ef_construct
+    if (info.hnsw_config.m, info.hnsw_config.ef_construct) != (hnsw_m, hnsw_ef_construct):
+        client.update_collection(
+            collection_name=collection_name, hnsw_config=HnswConfigDiff(m=hnsw_m, ef_construct=hnsw_ef_construct)
+        )
+        logger.info(
+            "HNSW of '%s' changed to m=%d ef_construct=%d (was m=%d ef_construct=%d)",
+            collection_name, hnsw_m, hnsw_ef_construct, info.hnsw_config.m, info.hnsw_config.ef_construct,
+        )
+
+
+def ensure_payload_indexes(client: QdrantClient, collection_name: str) -> None:
+    """
+    Create the payload indexes (source, page, section) the collection does not have
+    yet, so filtered searches are answered from them instead of scanning payloads.
+    The embedded store has no payload indexes and filters by scanning.
+    """
+    if is_local(client):
+        return
+    existing = client.get_collection(collection_name).payload_schema or {}
+    for field_name, schema in PAYLOAD_INDEXES.items():
+        if field_name not in existing:
+            client.create_payload_index(collection_name, field_name=field_name, field_schema=schema, wait=True)
+            logger.info("Created payload index '%s' on '%s'", field_name, collection_name)
+
+
+def missing_payload_fields(client: QdrantClient, collection_name: str) -> bool:
+    """True when some points were ingested before the filter fields existed."""
+    without_fields = Filter(must=[IsEmptyCondition(is_empty=PayloadField(key="source"))])
+    return client.count(collection_name, count_filter=without_fields, exact=True).count > 0
+
 
-from .embed import load_embed_model
+def set_payload_fields(client: QdrantClient, collection_name: str, chunks: List[Document]) -> None:
+    """Write the filter fields onto already stored points, one request per distinct set of values."""
+    groups: Dict[str, Tuple[Dict, List[str]]] = {}
+    for chunk in chunks:
+        fields = payload_fields(chunk.metadata)
+        groups.setdefault(json.dumps(fields, sort_keys=True), (fields, []))[1].append(point_id(chunk.metadata["id"]))
+    for fields, ids in groups.values():
+        client.set_payload(collection_name, payload=fields, points=ids, wait=True)
 
-client = QdrantClient(":memory:")
 
-embeddings = load_embed_model()
+def upsert_batch(
+    client: QdrantClient,
+    collection_name: str,
+    chunks: List[Document],
+    vectors: List[List[float]],
+) -> None:
+    """
+    Upsert one batch of embedded chunks with explicit point ids.
+    The payload layout matches QdrantVectorStore so the retrieval side can read it back,
+    plus the top-level source/page/section fields that filters run on.
+    """
+    points = [
+        PointStruct(
+            id=point_id(chunk.metadata["id"]),
+            vector=vector,
+            payload={
+                QdrantVectorStore.CONTENT_KEY: chunk.page_content,
+                QdrantVectorStore.METADATA_KEY: chunk.metadata,
+                **payload_fields(chunk.metadata),
+            },
+        )
+        for chunk, vector in zip(chunks, vectors)
+    ]
+    client.upsert(collection_name=collection_name, points=points, wait=True)
 
-vector_size = len(embeddings.embed_query("hello joe!"))
 
-if not client.collection_exists("Medicare"):
-    client.create_collection(
-        collection_name="Medicare",
-        vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE)
+def delete_chunks(client: QdrantClient, collection_name: str, chunk_ids: List[str]) -> None:
+    """Delete the points belonging to the given chunk ids."""
+    client.delete(
+        collection_name=collection_name,
+        points_selector=PointIdsList(points=[point_id(chunk_id) for chunk_id in chunk_ids]),
+        wait=True,
     )
 
-vector_store = QdrantVectorStore(
-    client=client,
-    collection_name="Patient Reference Materials",
-    embedding=embeddings,
-)
+
+def ingest(
+    file_paths: Union[str, Sequence[str]] = settings.PDF_FILE_PATH,
+    collection_name: str = settings.QDRANT_COLLECTION_NAME,
+    qdrant_path: str = settings.QDRANT_PATH,
+    batch_size: int = settings.INGEST_BATCH_SIZE,
+    manifest_path: Optional[str] = settings.INGEST_MANIFEST_PATH,
+    model_name: str = settings.EMBEDDING_MODEL_NAME,
+    rebuild: bool = False,
+    client: Optional[QdrantClient] = None,
+    embeddings: Optional[Embeddings] = None,
+    sparse_path: Optional[str] = settings.SPARSE_INDEX_PATH,
+    sparse_index: Optional[SparseIndex] = None,
+    quantization: Optional[str] = None,
+    flat_index_dir: Optional[str] = settings.FLAT_INDEX_DIR if settings.VECTOR_BACKEND == "flat" else None,
+) -> Dict:
+    """
+    Load, chunk, embed and upsert one or more PDFs into Qdrant in batches.
+
+    Pages are streamed through `iter_chunks`, so only one batch of chunks is held in
+    memory regardless of corpus size. A manifest of chunk id -> content hash decides
+    what needs work: only new or changed chunks are embedded and upserted, and chunks
+    of the ingested sources that no longer exist are deleted from the collection.
+    The manifest is saved after every batch, so it doubles as the checkpoint for
+    resuming an interrupted run. Pass `rebuild=True` to re-embed everything.
+    The BM25 index at `sparse_path` is kept in step with the collection under the
+    same point ids; if it is empty while the collection is not (e.g. it was added
+    later), unchanged chunks are indexed too, without being re-embedded.
+    Points get top-level source/page/section payload fields for filtered search; a
+    collection ingested before those existed has them set on its unchanged points
+    (and re-added to the BM25 index) the same way.
+    A new collection is created with `quantization` (default QDRANT_QUANTIZATION) and
+    the HNSW settings; an existing one is only re-quantized when `quantization` is given
+    and keeps its HNSW parameters.
+    With `flat_index_dir` (default when VECTOR_BACKEND is "flat") the collection is
+    exported to a memory-mapped flat index whenever it changed or has no export yet.
+    Returns a summary with chunk counts and throughput.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be a positive integer")
+    if isinstance(file_paths, str):
+        file_paths = [file_paths]
+
+    client = client or registry.get_client(qdrant_path)
+    embeddings = embeddings or registry.get_embeddings(model_name)
+    if sparse_index is None and sparse_path:
+        sparse_index = registry.get_sparse_index(sparse_path)
+
+    try:
+        manifest = IngestManifest(manifest_path, collection_name, model_name) if manifest_path else None
+        collection_exists = client.collection_exists(collection_name)
+        if collection_exists:
+            apply_index_config(client, collection_name, quantization)
+            ensure_payload_indexes(client, collection_name)
+        if manifest is not None and not collection_exists:
+            manifest.clear()
+        if sparse_index is not None and not collection_exists:
+            sparse_index.clear(collection_name)
+        backfill_sparse = sparse_index is not None and collection_exists and (
+            sparse_index.count(collection_name) == 0 or sparse_index.missing_fields(collection_name)
+        )
+        backfill_fields = collection_exists and missing_payload_fields(client, collection_name)
+
+        started = time.perf_counter()
+        total = 0
+        done = 0
+        seen: Set[str] = set()
+        batch: List[Document] = []
+        backfill_batch: List[Document] = []
+
+        def flush() -> None:
+            nonlocal collection_exists, done
+            vectors = embeddings.embed_documents([chunk.page_content for chunk in batch])
+            if not collection_exists:
+                ensure_collection(client, collection_name, len(vectors[0]), quantization)
+                collection_exists = True
+            upsert_batch(client, collection_name, batch, vectors)
+            if sparse_index is not None:
+                sparse_index.add(collection_name, batch, [point_id(chunk.metadata["id"]) for chunk in batch])
+            done += len(batch)
+            if manifest is not None:
+                manifest.record(batch)
+                manifest.save()
+            pbar.update(len(batch))
+            batch.clear()
+
+        def flush_backfill() -> None:
+            if backfill_fields:
+                set_payload_fields(client, collection_name, backfill_batch)
+            if backfill_sparse:
+                sparse_index.add(
+                    collection_name, backfill_batch, [point_id(chunk.metadata["id"]) for chunk in backfill_batch]
+                )
+            backfill_batch.clear()
+
+        with tqdm(desc="Ingesting chunks", unit="chunk", dynamic_ncols=True) as pbar:
+            for file_path in file_paths:
+                for chunk in iter_chunks(iter_pdf_pages(file_path)):
+                    total += 1
+                    seen.add(chunk.metadata["id"])
+                    if manifest is not None and not rebuild and manifest.is_current(chunk):
+                        if backfill_sparse or backfill_fields:
+                            backfill_batch.append(chunk)
+                            if len(backfill_batch) >= batch_size:
+                                flush_backfill()
+                        continue
+                    batch.append(chunk)
+                    if len(batch) >= batch_size:
+                        flush()
+            if batch:
+                flush()
+            if backfill_batch:
+                flush_backfill()
+
+        stale = manifest.stale_ids(seen, file_paths) if manifest is not None else []
+        if stale:
+            delete_chunks(client, collection_name, stale)
+            if sparse_index is not None:
+                sparse_index.remove(collection_name, [point_id(chunk_id) for chunk_id in stale])
+            manifest.forget(stale)
+            manifest.save()
+
+        if flat_index_dir and (done or stale or backfill_fields or not os.path.exists(os.path.join(flat_index_dir, collection_name))):
+            export_collection(client, collection_name, flat_index_dir)
+
+        elapsed = time.perf_counter() - started
+        if done or stale or backfill_sparse or backfill_fields:
+            # invalidates cached retrieval results in every process serving this collection
+            bump_index_version(collection_name)
+
+        stats = {
+            "total_chunks": total,
+            "ingested_chunks": done,
+            "unchanged_chunks": total - done,
+            "deleted_chunks": len(stale),
+            "seconds": round(elapsed, 3),
+            "chunks_per_sec": round(done / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+        logger.info(
+            "Ingestion complete: %d chunks upserted, %d deleted in %.2fs (%.2f chunks/sec)",
+            done, len(stale), elapsed, stats["chunks_per_sec"],
+        )
+        return stats
+
+    except Exception:
+        logger.exception("Ingestion of %s failed", file_paths)
+        raise
+
 
 if __name__ == '__main__':
-    pass
-    # from langchain_huggingface import HuggingFaceEmbeddings
-    # from qdrant_client.models import Distance, VectorParams
-    # from langchain_qdrant import QdrantVectorStore
-    # from qdrant_client import QdrantClient
-    # from typing import List, Optional, Union
-    # from tqdm import tqdm
-
-    # import sys
-    # import os
-
-    # project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-    # if project_root not in sys.path:
-    #     sys.path.append(project_root)
-
-    # from data import pdf_loader
-    # from chunk_docs import chunking
-    # from src.logger.logg import logs
-    # from src.config import settings
-    # from embed import load_embed_model
-
-    # logger = logs('ingest.log')
-
-    # # Load and chunk the PDF
-    # init_load = pdf_loader(settings.PDF_FILE_PATH)
-    # init_chunker = chunking(init_load)
-    # logger.info('Number of chunks received to be converted to embeddings: %i', len(init_chunker))
-    
-    # client = QdrantClient(path=r"D:\medicare\src\infrastructure")
-
-    # embeddings = load_embed_model()
-
-    # vector_size = len(embeddings.embed_query("hello joe!"))  # for obtaining embedding vector size
-
-    # if not client.collection_exists("Medicare"):
-    #     client.create_collection(
-    #         collection_name="Medicare",
-    #         vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE)
-    #     )
-
-    # vector_store = QdrantVectorStore(
-    #     client=client,
-    #     collection_name="Medicare",
-    #     embedding=embeddings,
-    # )
-
-    # # Progress bar with silent loop (no prints or logs inside to prevent tqdm conflict)
-    # with tqdm(total=len(init_chunker), desc="Embedding Chunks", dynamic_ncols=True) as pbar:
-    #     for idx, chunk in enumerate(init_chunker):
-    #         vector_store.add_documents([chunk])
-
-    #         # Log only every 100th chunk to reduce noise
-    #         if (idx + 1) % 100 == 0:
-    #             logger.info("Processed %i chunks so far...", idx + 1)
-
-    #         pbar.update(1)
-
-    # # Final log
-    # logger.info("Processing complete! Total chunk embeddings processed: %i", len(init_chunker))
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Embed a PDF and upsert its chunks into Qdrant.")
+    parser.add_argument("--file", nargs="+", default=[settings.PDF_FILE_PATH], help="PDF(s) to ingest")
+    parser.add_argument("--collection", default=settings.QDRANT_COLLECTION_NAME)
+    parser.add_argument("--qdrant-path", default=settings.QDRANT_PATH)
+    parser.add_argument("--batch-size", type=int, default=settings.INGEST_BATCH_SIZE)
+    parser.add_argument("--manifest", default=settings.INGEST_MANIFEST_PATH,
+                        help="chunk hash manifest used for incremental and resumable runs")
+    parser.add_argument("--rebuild", action="store_true", help="ignore the manifest and re-embed everything")
+    parser.add_argument("--quantization", choices=["none", "scalar", "binary"], default=None,
+                        help="vector quantization (needs a Qdrant server, see QDRANT_URL); a new collection "
+                             "defaults to QDRANT_QUANTIZATION, an existing one keeps its current mode")
+    parser.add_argument("--flat-index", default=settings.FLAT_INDEX_DIR if settings.VECTOR_BACKEND == "flat" else "",
+                        help="also export the collection to this memory-mapped flat index directory")
+    parser.add_argument("--sparse-index", default=settings.SPARSE_INDEX_PATH,
+                        help="BM25 index kept in step with the collection; empty to skip it")
+    args = parser.parse_args()
+
+    summary = ingest(
+        file_paths=args.file,
+        collection_name=args.collection,
+        qdrant_path=args.qdrant_path,
+        batch_size=args.batch_size,
+        manifest_path=args.manifest,
+        rebuild=args.rebuild,
+        sparse_path=args.sparse_index,
+        quantization=args.quantization,
+        flat_index_dir=args.flat_index,
+    )
+    print(
+        f"Ingested {summary['ingested_chunks']} chunks "
+        f"({summary['unchanged_chunks']} unchanged, {summary['deleted_chunks']} deleted) "
+        f"in {summary['seconds']}s "
+        f"-> {summary['chunks_per_sec']} chunks/sec"
+    )
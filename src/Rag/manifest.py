@@ -0,0 +1,97 @@
+from langchain_core.documents import Document
+from typing import Dict, Iterable, List, Set
+import hashlib
+import json
+import os
+
+from src.logger.logg import logs
+
+logger = logs("manifest.log")
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of a chunk's text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class IngestManifest:
+    """
+    Persisted record of what is already stored in a Qdrant collection.
+
+    Maps every chunk id ("source : page:idx") to the hash of its text and its source,
+    so re-ingestion only embeds new or changed chunks and can delete the chunks that
+    disappeared. The manifest is tied to one collection and embedding model; if either
+    changes the stored entries are discarded and everything is treated as new.
+    """
+
+    def __init__(self, path: str, collection_name: str, model_name: str):
+        self.path = path
+        self.collection_name = collection_name
+        self.model_name = model_name
+        self.chunks: Dict[str, Dict[str, str]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning("Ignoring unreadable manifest %s: %s", self.path, e)
+            return
+
+        if data.get("collection_name") != self.collection_name or data.get("model_name") != self.model_name:
+            logger.info(
+                "Manifest %s belongs to collection=%r model=%r, starting fresh",
+                self.path, data.get("collection_name"), data.get("model_name"),
+            )
+            return
+        self.chunks = data.get("chunks", {})
+
+    def save(self) -> None:
+        """Atomically write the manifest so an interrupted run never corrupts it."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "collection_name": self.collection_name,
+                    "model_name": self.model_name,
+                    "chunks": self.chunks,
+                },
+                f,
+            )
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        self.chunks = {}
+
+    def is_current(self, chunk: Document) -> bool:
+        """True if the chunk is already stored with identical text."""
+        entry = self.chunks.get(chunk.metadata["id"])
+        return entry is not None and entry.get("hash") == content_hash(chunk.page_content)
+
+    def stale_ids(self, seen: Set[str], sources: Iterable[str]) -> List[str]:
+        """
+        Ids recorded for one of `sources` that were not produced by the current run.
+        Chunks of sources outside `sources` are never reported.
+        """
+        source_set: Set[str] = {str(s) for s in sources}
+        return [
+            chunk_id for chunk_id, entry in self.chunks.items()
+            if entry.get("source") in source_set and chunk_id not in seen
+        ]
+
+    def record(self, chunks: Iterable[Document]) -> None:
+        """Mark chunks as stored with their current text hash."""
+        for chunk in chunks:
+            self.chunks[chunk.metadata["id"]] = {
+                "hash": content_hash(chunk.page_content),
+                "source": str(chunk.metadata.get("source", "unknown_source")),
+            }
+
+    def forget(self, chunk_ids: Iterable[str]) -> None:
+        """Drop chunk ids that were deleted from the collection."""
+        for chunk_id in chunk_ids:
+            self.chunks.pop(chunk_id, None)
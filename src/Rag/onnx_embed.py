@@ -0,0 +1,158 @@
+from langchain_core.embeddings import Embeddings
+from typing import List, Optional
+import os
+import threading
+
+import numpy as np
+
+from src.config import settings
+from src.logger.logg import logs
+
+logger = logs("onnx_embed.log")
+
+ONNX_FILE = "model.onnx"
+QUANTIZED_ONNX_FILE = "model_qint8.onnx"
+INSTALL_HINT = 'install the "onnx" extra: uv sync --extra onnx (or pip install "medicare[onnx]")'
+
+
+def _missing_extra(error: ImportError) -> ImportError:
+    """ImportError for a dependency of the ONNX backend that is not installed, naming the extra to add."""
+    return ImportError(f"The ONNX embedding backend needs {error.name or error}; {INSTALL_HINT}")
+
+
+def _repo_id(model_name: str) -> str:
+    """Hub repository of a model, resolving short names the way sentence-transformers does."""
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+
+def export_onnx_model(
+    model_name: str = settings.EMBEDDING_MODEL_NAME,
+    model_dir: str = settings.ONNX_MODEL_DIR,
+    quantize: bool = settings.ONNX_QUANTIZE,
+) -> str:
+    """
+    Make sure an ONNX export of `model_name` (plus its tokenizer.json) exists under
+    `model_dir` and return the path of the file to run.
+
+    The export shipped in the model's hub repository (onnx/model.onnx) is used when
+    there is one; otherwise the model is exported once through sentence-transformers'
+    ONNX backend (needs `optimum`). With `quantize` the weights are converted to int8
+    with ONNX Runtime dynamic quantization. Every step is skipped when its output is
+    already on disk, so this is cheap after the first run. Needs the "onnx" extra.
+    """
+    target = os.path.join(model_dir, model_name.replace("/", "__"))
+    fp32_path = os.path.join(target, ONNX_FILE)
+    int8_path = os.path.join(target, QUANTIZED_ONNX_FILE)
+
+    if not os.path.exists(fp32_path) or not os.path.exists(os.path.join(target, "tokenizer.json")):
+        os.makedirs(target, exist_ok=True)
+        try:
+            from huggingface_hub import hf_hub_download
+
+            for file_name, local_name in (("onnx/model.onnx", ONNX_FILE), ("tokenizer.json", "tokenizer.json")):
+                downloaded = hf_hub_download(_repo_id(model_name), file_name)
+                with open(downloaded, "rb") as src, open(os.path.join(target, local_name), "wb") as dst:
+                    dst.write(src.read())
+            logger.info("Downloaded ONNX export of %s", model_name)
+        except Exception as e:
+            logger.info("No ONNX export published for %s (%s), exporting locally", model_name, e)
+            try:
+                import optimum.onnxruntime  # noqa: F401  (sentence-transformers' ONNX backend)
+            except ImportError as missing:
+                raise _missing_extra(missing) from missing
+            from sentence_transformers import SentenceTransformer
+
+            export_dir = os.path.join(target, "export")
+            SentenceTransformer(model_name, backend="onnx", device="cpu").save_pretrained(export_dir)
+            os.replace(os.path.join(export_dir, "onnx", ONNX_FILE), fp32_path)
+            os.replace(os.path.join(export_dir, "tokenizer.json"), os.path.join(target, "tokenizer.json"))
+            logger.info("Exported %s to ONNX at %s", model_name, fp32_path)
+
+    if not quantize:
+        return fp32_path
+    if not os.path.exists(int8_path):
+        try:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+        except ImportError as e:
+            raise _missing_extra(e) from e
+
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        logger.info("Quantized %s to int8 at %s", model_name, int8_path)
+    return int8_path
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence embeddings computed with ONNX Runtime on CPU, without importing torch.
+
+    Reproduces the sentence-transformers pipeline of all-MiniLM-L6-v2 style models:
+    tokenize (truncating at `max_length`), run the transformer, mean-pool the token
+    states under the attention mask and L2-normalize. Texts are run in batches of
+    `batch_size`, padded only to the longest text of their batch.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        max_length: int = settings.EMBEDDING_MAX_LENGTH,
+        batch_size: int = 32,
+        intra_op_threads: int = settings.ONNX_INTRA_OP_THREADS,
+        inter_op_threads: int = settings.ONNX_INTER_OP_THREADS,
+    ):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise _missing_extra(e) from e
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads:
+            options.inter_op_num_threads = inter_op_threads
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(os.path.dirname(model_path), "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        self.batch_size = batch_size
+        # the tokenizer's Rust state is not safe to reconfigure from several threads at once
+        self._lock = threading.Lock()
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        with self._lock:
+            encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.asarray([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_states = self.session.run(None, feeds)[0]
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_states * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        batches = [self._embed(texts[i:i + self.batch_size]) for i in range(0, len(texts), self.batch_size)]
+        return np.concatenate(batches).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0].tolist()
+
+
+def load_onnx_embeddings(
+    model_name: str = settings.EMBEDDING_MODEL_NAME,
+    quantize: bool = settings.ONNX_QUANTIZE,
+    model_dir: Optional[str] = None,
+) -> OnnxEmbeddings:
+    """Export (first run only) and open the ONNX version of `model_name`."""
+    model_path = export_onnx_model(model_name, model_dir or settings.ONNX_MODEL_DIR, quantize)
+    embeddings = OnnxEmbeddings(model_path)
+    logger.info("ONNX embedding model ready: %s (%s)", model_name, os.path.basename(model_path))
+    return embeddings
@@ -0,0 +1,251 @@
+from qdrant_client import QdrantClient
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from typing import Dict, Tuple, Optional
+import threading
+
+from src.config import settings
+from src.logger.logg import logs
+from .retrieve import make_client, get_vector_store
+from .embed import load_embed_model
+from .sparse import SparseIndex
+from .rerank import Reranker, load_reranker
+from .flat_index import FlatVectorStore
+
+logger = logs("registry.log")
+
+StoreKey = Tuple[str, str, str]
+
+
+class ResourceRegistry:
+    """
+    Process-wide cache of the heavy retrieval resources.
+
+    Qdrant clients and sparse (BM25) indexes are keyed by storage path, embedding
+    models by model name and vector stores by (collection name, path, model name).
+    Every caller asking for the same key receives the same object, so the
+    sentence-transformers weights are loaded and the local Qdrant store is opened
+    only once per process.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._clients: Dict[str, QdrantClient] = {}
+        self._embeddings: Dict[str, Embeddings] = {}
+        self._stores: Dict[StoreKey, VectorStore] = {}
+        self._sparse: Dict[str, SparseIndex] = {}
+        self._rerankers: Dict[str, Optional[Reranker]] = {}
+
+    def get_client(self, path: str = settings.QDRANT_PATH) -> QdrantClient:
+        """Return the shared Qdrant client for `path`, opening it on first use."""
+        client = self._clients.get(path)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(path)
+            if client is None:
+                client = make_client(path=path)
+                self._clients[path] = client
+            return client
+
+    def get_sparse_index(self, path: str = settings.SPARSE_INDEX_PATH) -> SparseIndex:
+        """Return the shared BM25 index stored at `path`, opening it on first use."""
+        index = self._sparse.get(path)
+        if index is not None:
+            return index
+        with self._lock:
+            index = self._sparse.get(path)
+            if index is None:
+                index = SparseIndex(path)
+                self._sparse[path] = index
+            return index
+
+    def get_reranker(self, model_name: str = settings.RERANK_MODEL_NAME) -> Optional[Reranker]:
+        """
+        Return the shared cross-encoder reranker for `model_name`, loading it on first use.
+        None if the model could not be loaded; that outcome is remembered until reload().
+        """
+        if model_name in self._rerankers:
+            return self._rerankers[model_name]
+        with self._lock:
+            if model_name not in self._rerankers:
+                self._rerankers[model_name] = load_reranker(model_name)
+            return self._rerankers[model_name]
+
+    def get_embeddings(self, model_name: str = settings.EMBEDDING_MODEL_NAME) -> Embeddings:
+        """Return the shared embedding model for `model_name`, loading it on first use."""
+        embeddings = self._embeddings.get(model_name)
+        if embeddings is not None:
+            return embeddings
+        with self._lock:
+            embeddings = self._embeddings.get(model_name)
+            if embeddings is None:
+                embeddings = load_embed_model(model_name)
+                self._embeddings[model_name] = embeddings
+            return embeddings
+
+    def set_embeddings(self, model_name: str, embeddings: Embeddings) -> None:
+        """
+        Install an already-built embedding model under `model_name` (e.g. a fake one for
+        offline benchmarks); stores using that model are rebuilt on their next request.
+        """
+        with self._lock:
+            self._embeddings[model_name] = embeddings
+            for key in [key for key in self._stores if key[2] == model_name]:
+                del self._stores[key]
+
+    def get_vector_store(
+        self,
+        collection_name: str = settings.QDRANT_COLLECTION_NAME,
+        path: str = settings.QDRANT_PATH,
+        model_name: str = settings.EMBEDDING_MODEL_NAME,
+        backend: str = settings.VECTOR_BACKEND,
+    ) -> VectorStore:
+        """
+        Return the shared vector store for (collection, path, model).
+        With backend "flat" it is a FlatVectorStore over settings.FLAT_INDEX_DIR and
+        no Qdrant client (or its storage lock) is opened.
+        """
+        if backend == "flat":
+            path = settings.FLAT_INDEX_DIR
+        key = (collection_name, path, model_name)
+        store = self._stores.get(key)
+        if store is not None:
+            return store
+        with self._lock:
+            store = self._stores.get(key)
+            if store is None:
+                if backend == "flat":
+                    store = FlatVectorStore(path, collection_name, self.get_embeddings(model_name))
+                else:
+                    store = get_vector_store(
+                        client=self.get_client(path),
+                        collection_name=collection_name,
+                        embeddings=self.get_embeddings(model_name),
+                    )
+                self._stores[key] = store
+            return store
+
+    def warmup(
+        self,
+        collection_name: str = settings.QDRANT_COLLECTION_NAME,
+        path: str = settings.QDRANT_PATH,
+        model_name: str = settings.EMBEDDING_MODEL_NAME,
+    ) -> VectorStore:
+        """
+        Build every resource for the given key ahead of the first request and run one
+        throwaway query embedding so lazy model initialisation is paid here.
+        """
+        store = self.get_vector_store(collection_name, path, model_name)
+        self.get_embeddings(model_name).embed_query("warmup")
+        if isinstance(store, FlatVectorStore):
+            len(store)  # maps the index file
+
+        if settings.RERANK_ENABLED:
+            reranker = self.get_reranker()
+            if reranker is not None:
+                reranker.score("warmup", ["warmup"])
+        logger.info("Registry warmed up for collection '%s' at %s", collection_name, path)
+        return store
+
+    def health_check(self) -> Dict[str, Dict[str, object]]:
+        """
+        Probe every cached resource and report its status.
+        Returns a dict with "clients", "embeddings" and "stores" sections.
+        """
+        with self._lock:
+            clients = dict(self._clients)
+            embeddings = dict(self._embeddings)
+            stores = dict(self._stores)
+
+        report: Dict[str, Dict[str, object]] = {"clients": {}, "embeddings": {}, "stores": {}}
+        for path, client in clients.items():
+            try:
+                client.get_collections()
+                report["clients"][path] = "ok"
+            except Exception as e:
+                report["clients"][path] = f"error: {e}"
+
+        for model_name, model in embeddings.items():
+            try:
+                model.embed_query("health")
+                report["embeddings"][model_name] = "ok"
+            except Exception as e:
+                report["embeddings"][model_name] = f"error: {e}"
+
+        for (collection_name, path, model_name), store in stores.items():
+            name = f"{collection_name}@{path}[{model_name}]"
+            try:
+                if isinstance(store, FlatVectorStore):
+                    count = len(store)
+                else:
+                    count = store.client.count(collection_name, exact=False).count
+                report["stores"][name] = {"status": "ok", "points": count}
+            except Exception as e:
+                report["stores"][name] = {"status": f"error: {e}"}
+
+        return report
+
+    def reload(self, path: Optional[str] = None, model_name: Optional[str] = None) -> None:
+        """
+        Drop and rebuild cached resources.
+
+        With no arguments everything is reset. Passing `path` only reopens that Qdrant
+        client, passing `model_name` only reloads that embedding model; stores that
+        depend on a reloaded resource are rebuilt lazily on their next request.
+        A new embedding model is loaded before the old one is swapped out, so callers
+        never see a missing model. Local Qdrant storage can only be opened by one
+        client at a time, so the old client is closed before the new one is opened.
+        A full reset also drops the rerankers, which then load again on first use.
+        """
+        with self._lock:
+            reload_all = path is None and model_name is None
+
+            model_names = list(self._embeddings) if reload_all else ([model_name] if model_name else [])
+            for name in model_names:
+                self._embeddings[name] = load_embed_model(name)
+
+            paths = list(self._clients) if reload_all else ([path] if path else [])
+            for client_path in paths:
+                old = self._clients.pop(client_path, None)
+                if old is not None:
+                    try:
+                        old.close()
+                    except Exception as e:
+                        logger.warning("Failed to close Qdrant client at %s: %s", client_path, e)
+                self._clients[client_path] = make_client(path=client_path)
+
+            if reload_all:
+                for reranker in self._rerankers.values():
+                    if reranker is not None:
+                        reranker.close()
+                self._rerankers.clear()
+
+            for key in list(self._stores):
+                _, store_path, store_model = key
+                if reload_all or store_path in paths or store_model in model_names:
+                    del self._stores[key]
+
+            logger.info("Registry reloaded (paths=%s, models=%s)", paths, model_names)
+
+    def close(self) -> None:
+        """Close every Qdrant client and forget all cached resources."""
+        with self._lock:
+            for path, client in self._clients.items():
+                try:
+                    client.close()
+                except Exception as e:
+                    logger.warning("Failed to close Qdrant client at %s: %s", path, e)
+            self._clients.clear()
+            for index in self._sparse.values():
+                index.close()
+            self._sparse.clear()
+            for reranker in self._rerankers.values():
+                if reranker is not None:
+                    reranker.close()
+            self._rerankers.clear()
+            self._embeddings.clear()
+            self._stores.clear()
+
+
+registry = ResourceRegistry()
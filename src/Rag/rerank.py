@@ -0,0 +1,92 @@
+from langchain_core.documents import Document
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, List, Optional, Tuple
+import threading
+
+from src.config import settings
+from src.logger.logg import logs
+
+logger = logs("rerank.log")
+
+ScoredDocs = List[Tuple[Document, float]]
+
+
+def load_rerank_model(model_name: str = settings.RERANK_MODEL_NAME, max_length: int = settings.RERANK_MAX_LENGTH) -> Any:
+    """
+    Loads a sentence-transformers cross-encoder.
+    Args :
+        model_name(default = cross-encoder/ms-marco-MiniLM-L-6-v2)
+        max_length: token limit for one (query, passage) pair; longer passages are truncated.
+    """
+    from sentence_transformers import CrossEncoder
+
+    model = CrossEncoder(model_name, max_length=max_length)
+    logger.info("Rerank model successfully loaded: %s", model_name)
+    return model
+
+
+class Reranker:
+    """
+    Second retrieval stage: re-scores first-stage candidates with a cross-encoder.
+
+    All (query, passage) pairs are scored in one batched `predict` call on a single
+    worker thread. If that does not finish within `budget_ms`, the caller gets the
+    candidates back in first-stage order and the late result is discarded, so a slow
+    or overloaded model can never add more than the budget to a retrieval.
+    """
+
+    def __init__(self, model: Any, batch_size: int = settings.RERANK_BATCH_SIZE, budget_ms: float = settings.RERANK_BUDGET_MS):
+        self.model = model
+        self.batch_size = batch_size
+        self.budget_ms = budget_ms
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+        # one worker: pairs queued behind a late batch time out instead of piling up
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        """Cross-encoder relevance of every text to `query`, without a time limit."""
+        scores = self.model.predict(
+            [(query, text) for text in texts], batch_size=self.batch_size, show_progress_bar=False
+        )
+        return [float(score) for score in scores]
+
+    def rerank(self, query: str, candidates: ScoredDocs, top_n: int) -> Tuple[ScoredDocs, bool]:
+        """
+        Return the `top_n` best candidates by cross-encoder score and True, or the first
+        `top_n` candidates with their original scores and False when the budget ran out
+        or the model failed. A single candidate is returned as is, with True.
+        """
+        if len(candidates) <= 1:
+            return candidates[:top_n], True
+
+        future = self._pool.submit(self.score, query, [doc.page_content for doc, _ in candidates])
+        try:
+            scores = future.result(timeout=self.budget_ms / 1000.0 if self.budget_ms > 0 else None)
+        except FutureTimeout:
+            future.cancel()
+            self._fallback("Rerank exceeded its %.0f ms budget, keeping first-stage order", self.budget_ms)
+            return candidates[:top_n], False
+        except Exception as e:
+            self._fallback("Rerank failed, keeping first-stage order: %s", e)
+            return candidates[:top_n], False
+
+        ranked = sorted(zip(candidates, scores), key=lambda item: item[1], reverse=True)
+        return [(doc, score) for (doc, _), score in ranked[:top_n]], True
+
+    def _fallback(self, message: str, *args: Any) -> None:
+        with self._lock:
+            self.fallbacks += 1
+        logger.warning(message, *args)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def load_reranker(model_name: str = settings.RERANK_MODEL_NAME) -> Optional[Reranker]:
+    """Build the Reranker for `model_name`; None if the model cannot be loaded."""
+    try:
+        return Reranker(load_rerank_model(model_name))
+    except Exception as e:
+        logger.error("Could not load rerank model %s, reranking disabled: %s", model_name, e)
+        return None
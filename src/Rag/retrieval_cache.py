@@ -0,0 +1,135 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+import uuid
+
+from src.config import settings
+from src.logger.logg import logs
+
+logger = logs("retrieval_cache.log")
+
+CacheKey = Tuple[Hashable, ...]
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?.!]+$")
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation so near-identical questions share a key."""
+    query = unicodedata.normalize("NFC", query).casefold()
+    query = _TRAILING_PUNCTUATION.sub("", query)
+    return _WHITESPACE.sub(" ", query).strip()
+
+
+def bump_index_version(collection_name: str, version_path: str = settings.INDEX_VERSION_PATH) -> str:
+    """
+    Record that the content of `collection_name` changed.
+    Called by ingestion; every process reading the version file drops its cached results.
+    """
+    versions: Dict[str, str] = {}
+    if os.path.exists(version_path):
+        try:
+            with open(version_path, "r", encoding="utf-8") as f:
+                versions = json.load(f)
+        except Exception as e:
+            logger.warning("Rewriting unreadable index version file %s: %s", version_path, e)
+
+    version = uuid.uuid4().hex
+    versions[collection_name] = version
+
+    os.makedirs(os.path.dirname(os.path.abspath(version_path)), exist_ok=True)
+    tmp_path = f"{version_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(versions, f)
+    os.replace(tmp_path, version_path)
+    logger.info("Index version of '%s' bumped to %s", collection_name, version)
+    return version
+
+
+class IndexVersions:
+    """Reads collection content versions, re-parsing the file only when its mtime changes."""
+
+    def __init__(self, version_path: str = settings.INDEX_VERSION_PATH):
+        self.version_path = version_path
+        self._mtime: Optional[int] = None
+        self._versions: Dict[str, str] = {}
+
+    def get(self, collection_name: str) -> str:
+        try:
+            mtime = os.stat(self.version_path).st_mtime_ns
+        except FileNotFoundError:
+            return ""
+        if mtime != self._mtime:
+            try:
+                with open(self.version_path, "r", encoding="utf-8") as f:
+                    self._versions = json.load(f)
+                self._mtime = mtime
+            except Exception as e:
+                logger.warning("Could not read index versions from %s: %s", self.version_path, e)
+                return ""
+        return self._versions.get(collection_name, "")
+
+
+class RetrievalCache:
+    """
+    Size-bounded LRU of retrieval results with a TTL.
+
+    Entries are keyed by (normalized query, collection, top_k, *extra) and remember the
+    collection's content version they were computed against; a lookup after ingestion
+    bumped that version is a miss. Cached results are shared, so treat them as read-only.
+    """
+
+    def __init__(
+        self,
+        max_items: int = settings.RETRIEVAL_CACHE_SIZE,
+        ttl_seconds: float = settings.RETRIEVAL_CACHE_TTL_SECONDS,
+        versions: Optional[IndexVersions] = None,
+    ):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.versions = versions or IndexVersions()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, Tuple[float, str, Any]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(query: str, collection_name: str, top_k: int, *extra: Hashable) -> CacheKey:
+        """Build the cache key; `extra` carries any other argument that changes the result."""
+        return (normalize_query(query), collection_name, top_k, *extra)
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        version = self.versions.get(key[1])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, entry_version, result = entry
+                if expires_at > time.monotonic() and entry_version == version:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: CacheKey, result: Any) -> None:
+        if self.max_items <= 0:
+            return
+        version = self.versions.get(key[1])
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, version, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+retrieval_cache = RetrievalCache()
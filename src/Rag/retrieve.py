@@ -1,16 +1,32 @@
 from langchain_qdrant import QdrantVectorStore
 from qdrant_client import QdrantClient
-from langchain_huggingface import HuggingFaceEmbeddings
-from typing import Optional
+from qdrant_client.models import QuantizationSearchParams, SearchParams
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from typing import Any, List, Optional, Tuple
 
 from .embed import load_embed_model
+from .retrieval_cache import RetrievalCache
+from .sparse import reciprocal_rank_fusion
+from .rerank import Reranker
+from .filters import SearchFilter
+from src.config import settings
 from src.logger.logg import logs
 
 logger = logs("retrieve.log")
 
-def make_client(path: str = r"D:\medicare\src\infrastructure") -> QdrantClient:
-    """Initialize and return a local Qdrant client."""
+def make_client(
+    path: str = r"D:\medicare\src\infrastructure",
+    url: str = settings.QDRANT_URL,
+    api_key: str = settings.QDRANT_API_KEY,
+) -> QdrantClient:
+    """Initialize and return a Qdrant client: the server at `url` if set, else the local store at `path`."""
     try:
+        if url:
+            client = QdrantClient(url=url, api_key=api_key or None)
+            logger.info(f"Connected to Qdrant server at {url}")
+            return client
         client = QdrantClient(path=path)
         logger.info(f"Connected to Qdrant at {path}")
         return client
@@ -19,6 +35,45 @@ def make_client(path: str = r"D:\medicare\src\infrastructure") -> QdrantClient:
         raise
 
 
+def is_local(client: QdrantClient) -> bool:
+    """True for the embedded (on-disk or in-memory) store, which has no quantization or HNSW tuning."""
+    options = getattr(client, "init_options", {}) or {}
+    return bool(options.get("path")) or options.get("location") == ":memory:"
+
+
+def search_params(
+    client: Optional[QdrantClient],
+    quantization: str = settings.QDRANT_QUANTIZATION,
+    rescore: bool = settings.QDRANT_RESCORE,
+    oversampling: float = settings.QDRANT_OVERSAMPLING,
+    hnsw_ef: int = settings.QDRANT_HNSW_EF,
+) -> Optional[SearchParams]:
+    """
+    Query-time search parameters: the HNSW beam width `hnsw_ef` (0 = server default)
+    and, for a quantized collection, fetching `oversampling` x limit candidates by
+    quantized score and rescoring them on the original vectors.
+    None when there is nothing to set, for the embedded store, which always
+    searches exactly, and for stores without a Qdrant client (the flat backend).
+    """
+    if client is None or is_local(client) or (quantization == "none" and not hnsw_ef):
+        return None
+    return SearchParams(
+        hnsw_ef=hnsw_ef or None,
+        quantization=None if quantization == "none" else QuantizationSearchParams(rescore=rescore, oversampling=oversampling),
+    )
+
+
+def store_filter(vector_store: VectorStore, search_filter: Optional[SearchFilter]) -> Any:
+    """
+    `search_filter` in the form the store's `filter=` argument takes: a Qdrant Filter
+    over the indexed payload fields, or the SearchFilter itself for the flat index.
+    None for no filter.
+    """
+    if not search_filter:
+        return None
+    return search_filter.to_qdrant() if isinstance(vector_store, QdrantVectorStore) else search_filter
+
+
 def get_collection(client: QdrantClient, collection_name: str = "Medicare"):
     """Return Qdrant collection metadata if it exists."""
     try:
@@ -30,7 +85,7 @@ def get_collection(client: QdrantClient, collection_name: str = "Medicare"):
 def get_vector_store(
     client: QdrantClient,
     collection_name: str = "Medicare",
-    embeddings: Optional[HuggingFaceEmbeddings] = None,
+    embeddings: Optional[Embeddings] = None,
 ) -> QdrantVectorStore:
     """Create a QdrantVectorStore for similarity search."""
     if embeddings is None:
@@ -45,27 +100,84 @@ def get_vector_store(
         logger.error(f"Failed to initialize vector store: {e}")
         raise
 
-def retrieve_context(query: str, vector_store: QdrantVectorStore, top_k: int = 5):
+def retrieve_context(
+    query: str,
+    vector_store: VectorStore,
+    top_k: int = 5,
+    cache: Optional[RetrievalCache] = None,
+    reranker: Optional[Reranker] = None,
+    search_filter: Optional[SearchFilter] = None,
+):
     """
     Retrieve top-k most similar documents for a given query,
     returning text, score, and source citation if available.
+    When a RetrievalCache is given, repeated queries are answered from it.
+    With a Reranker, settings.RERANK_CANDIDATES hits are fetched and the
+    cross-encoder keeps the best top_k (or the first top_k if it runs out of budget;
+    such fallback results are not cached).
+    A SearchFilter restricts the search to its sources / pages / section.
     """
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.make_key(
+            query, vector_store.collection_name, top_k, reranker is not None, search_filter.key() if search_filter else None
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
     try:
-        results = vector_store.search(query, search_type="similarity", limit=top_k)
+        params = search_params(getattr(vector_store, "client", None))
+        scope = store_filter(vector_store, search_filter)
+        reranked = True
+        if reranker is not None:
+            candidates = vector_store.similarity_search_with_score(
+                query, k=max(top_k, settings.RERANK_CANDIDATES), filter=scope, search_params=params
+            )
+            results, reranked = reranker.rerank(query, candidates, top_k)
+        else:
+            results = [
+                (res, None)
+                for res in vector_store.search(query, search_type="similarity", k=top_k, filter=scope, search_params=params)
+            ]
         formatted = []
-        for res in results:
+        for res, score in results:
             # LangChain Document-like object
             text = getattr(res, "page_content", "") if hasattr(res, "page_content") else str(res)
             meta = getattr(res, "metadata", {}) or {}
-            score = getattr(res, "score", None)
+            score = score if score is not None else getattr(res, "score", None)
             citation = meta.get("source") or meta.get("filename") or meta.get("url") or "unknown"
             formatted.append({"text": text, "score": score, "citation": citation})
-        logger.info(f"Retrieved {len(formatted)} results for query: '{query}'")
+        # the query text may contain patient details, so only its size is logged
+        logger.info("Retrieved %d results for a query of %d chars", len(formatted), len(query))
+        if cache_key is not None and reranked:
+            cache.put(cache_key, formatted)
         return formatted
     except Exception as e:
-        logger.error(f"Error during retrieval: {e}")
+        logger.error("Error during retrieval: %s", e)
         return []
 
+def fuse_hybrid(
+    vector_store: VectorStore,
+    dense: List[Tuple[Document, float]],
+    sparse: List[Tuple[str, float]],
+    top_k: int = 5,
+    rrf_k: int = settings.RRF_K,
+) -> List[Tuple[Document, float]]:
+    """
+    Fuse dense (document, score) hits and sparse (point id, BM25 score) hits with
+    reciprocal rank fusion and return the top_k as (document, fused score).
+    Chunks found only by BM25 are fetched from the collection by point id.
+    """
+    by_id = {str(doc.metadata["_id"]): doc for doc, _ in dense}
+    fused = reciprocal_rank_fusion([list(by_id), [doc_id for doc_id, _ in sparse]], k=rrf_k)[:top_k]
+
+    missing = [doc_id for doc_id, _ in fused if doc_id not in by_id]
+    if missing:
+        for doc in vector_store.get_by_ids(missing):
+            by_id[str(doc.metadata["_id"])] = doc
+    return [(by_id[doc_id], score) for doc_id, score in fused if doc_id in by_id]
+
 def test_loop():
     """Simple CLI test loop to interactively check retrieval."""
     client = make_client()
@@ -0,0 +1,226 @@
+from langchain_core.documents import Document
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import heapq
+import math
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+from src.logger.logg import logs
+from .filters import SearchFilter, payload_fields, register_sql_functions
+
+logger = logs("sparse.log")
+
+# Words, numbers and compounds such as "egfr", "2.5", "mg/dl", "ace-inhibitor"
+_TOKEN = re.compile(r"[a-z0-9]+(?:[./\-][a-z0-9]+)*")
+_SEPARATORS = re.compile(r"[./\-]")
+_NUMBER = re.compile(r"\d+(?:[./]\d+)*")
+
+STOPWORDS = frozenset(
+    """
+    a an and are as at be been but by can could did do does for from had has have how i if in into is it its
+    may me might my no not of on or our should so than that the their them then there these they this those
+    to was we were what when where which while who why will with would you your
+    """.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Case-fold `text` into BM25 terms.
+
+    Numbers and dotted/slashed/hyphenated compounds are kept whole ("2.5", "mg/dl",
+    "ace-inhibitor") so exact doses and units match; compounds of words also emit
+    their parts, so "ace-inhibitor" still matches a query for "inhibitor".
+    """
+    tokens: List[str] = []
+    for token in _TOKEN.findall(unicodedata.normalize("NFKC", text).casefold()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        if not _NUMBER.fullmatch(token) and _SEPARATORS.search(token):
+            tokens.extend(
+                part for part in _SEPARATORS.split(token)
+                if part not in STOPWORDS and (len(part) > 1 or part.isdigit())
+            )
+    return tokens
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fuse several best-first id rankings into one: every id scores sum(1 / (k + rank))
+    over the rankings it appears in (rank starting at 1). Returns (id, score), best first.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class SparseIndex:
+    """
+    Okapi BM25 index of the ingested chunks, stored in SQLite.
+
+    Documents are keyed by (collection, point id), the same ids the chunks have in
+    Qdrant, so sparse and dense hits can be fused and resolved against one store.
+    Postings are read per query term, so the index never has to fit in memory.
+    Document count and average length are cached until this or another connection
+    writes to the file. Every document also stores its source/page/section payload
+    fields, so a SearchFilter is applied inside the postings query.
+    """
+
+    k1 = 1.5
+    b = 0.75
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Tuple[int, int, float]] = {}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        register_sql_functions(self._db)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            "collection TEXT, doc_id TEXT, length INTEGER, source TEXT, page INTEGER, section TEXT, "
+            "PRIMARY KEY (collection, doc_id)) WITHOUT ROWID"
+        )
+        # indexes written before the payload fields existed get the columns; their rows
+        # stay NULL (out of every filter's scope) until ingestion re-adds them
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(docs)")}
+        for column, kind in (("source", "TEXT"), ("page", "INTEGER"), ("section", "TEXT")):
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE docs ADD COLUMN {column} {kind}")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "collection TEXT, term TEXT, doc_id TEXT, tf INTEGER, length INTEGER, "
+            "PRIMARY KEY (collection, term, doc_id)) WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS postings_doc ON postings (collection, doc_id)")
+        self._db.commit()
+        logger.info("Sparse index ready at %s", path)
+
+    def _delete(self, collection_name: str, doc_ids: List[str]) -> None:
+        for start in range(0, len(doc_ids), 500):
+            part = doc_ids[start:start + 500]
+            marks = ",".join("?" * len(part))
+            self._db.execute(f"DELETE FROM postings WHERE collection = ? AND doc_id IN ({marks})", [collection_name, *part])
+            self._db.execute(f"DELETE FROM docs WHERE collection = ? AND doc_id IN ({marks})", [collection_name, *part])
+
+    def add(self, collection_name: str, chunks: Iterable[Document], doc_ids: Iterable[str]) -> None:
+        """Index (or re-index) chunks under their point ids."""
+        docs = []
+        postings = []
+        for chunk, doc_id in zip(chunks, doc_ids):
+            counts = Counter(tokenize(chunk.page_content))
+            length = sum(counts.values())
+            fields = payload_fields(chunk.metadata)
+            docs.append((collection_name, doc_id, length, fields["source"], fields["page"], fields["section"]))
+            postings.extend((collection_name, term, doc_id, tf, length) for term, tf in counts.items())
+        if not docs:
+            return
+        with self._lock:
+            self._delete(collection_name, [doc[1] for doc in docs])
+            self._db.executemany(
+                "INSERT INTO docs (collection, doc_id, length, source, page, section) VALUES (?, ?, ?, ?, ?, ?)", docs
+            )
+            self._db.executemany(
+                "INSERT INTO postings (collection, term, doc_id, tf, length) VALUES (?, ?, ?, ?, ?)", postings
+            )
+            self._db.commit()
+            self._stats.pop(collection_name, None)
+
+    def remove(self, collection_name: str, doc_ids: Iterable[str]) -> None:
+        doc_ids = list(doc_ids)
+        if not doc_ids:
+            return
+        with self._lock:
+            self._delete(collection_name, doc_ids)
+            self._db.commit()
+            self._stats.pop(collection_name, None)
+
+    def clear(self, collection_name: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM postings WHERE collection = ?", (collection_name,))
+            self._db.execute("DELETE FROM docs WHERE collection = ?", (collection_name,))
+            self._db.commit()
+            self._stats.pop(collection_name, None)
+
+    def _collection_stats(self, collection_name: str) -> Tuple[int, float]:
+        # data_version changes whenever another connection (e.g. an ingestion run) commits
+        data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        cached = self._stats.get(collection_name)
+        if cached is not None and cached[0] == data_version:
+            return cached[1], cached[2]
+        count, total = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs WHERE collection = ?", (collection_name,)
+        ).fetchone()
+        avg_length = total / count if total else 1.0
+        self._stats[collection_name] = (data_version, count, avg_length)
+        return count, avg_length
+
+    def count(self, collection_name: str) -> int:
+        with self._lock:
+            return self._collection_stats(collection_name)[0]
+
+    def missing_fields(self, collection_name: str) -> bool:
+        """Whether some documents were indexed without payload fields (before filters existed)."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM docs WHERE collection = ? AND source IS NULL AND page IS NULL LIMIT 1", (collection_name,)
+            ).fetchone()
+        return row is not None
+
+    def search(
+        self, collection_name: str, query: str, limit: int, search_filter: Optional[SearchFilter] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Return up to `limit` (point id, BM25 score) pairs for `query`, best first.
+        With `search_filter` only documents in its scope are scored; IDF and average
+        length still come from the whole collection, so scores do not depend on the scope.
+        """
+        clause, clause_params = search_filter.sql("d") if search_filter else ("", [])
+        terms = set(tokenize(query))
+        if not terms or limit <= 0:
+            return []
+        scores: Dict[str, float] = {}
+        with self._lock:
+            count, avg_length = self._collection_stats(collection_name)
+            if not count:
+                return []
+            for term in terms:
+                if clause:
+                    frequency = self._db.execute(
+                        "SELECT COUNT(*) FROM postings WHERE collection = ? AND term = ?", (collection_name, term)
+                    ).fetchone()[0]
+                    rows = self._db.execute(
+                        "SELECT p.doc_id, p.tf, p.length FROM postings p "
+                        "JOIN docs d ON d.collection = p.collection AND d.doc_id = p.doc_id "
+                        f"WHERE p.collection = ? AND p.term = ?{clause}",
+                        (collection_name, term, *clause_params),
+                    ).fetchall()
+                else:
+                    rows = self._db.execute(
+                        "SELECT doc_id, tf, length FROM postings WHERE collection = ? AND term = ?",
+                        (collection_name, term),
+                    ).fetchall()
+                    frequency = len(rows)
+                if not rows:
+                    continue
+                idf = math.log(1.0 + (count - frequency + 0.5) / (frequency + 0.5))
+                for doc_id, tf, length in rows:
+                    norm = self.k1 * (1.0 - self.b + self.b * length / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None  # type: ignore[assignment]
+
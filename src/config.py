@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -11,16 +12,96 @@ class Settings(BaseSettings):
 
     # --- Data Configuration ---
     PDF_FILE_PATH: str = r"D:\medicare\Data\comprehensive-clinical-nephrology.pdf"
+    PDF_LOADER_WORKERS: int = 1
+    PATIENT_REPORTS_PATH: str = r"D:\medicare\Data\reports.json"
 
     # --- Embedding Configuration ---
     EMBEDDING_MODEL_NAME: str = "all-MiniLM-L6-v2"
+    EMBEDDING_CACHE_PATH: str = r"D:\medicare\Data\embedding_cache.sqlite"
+    EMBEDDING_CACHE_MEMORY_ITEMS: int = 10000
+    EMBEDDING_BACKEND: str = "torch"  # "torch" (sentence-transformers) or "onnx" (ONNX Runtime, no torch import)
+    EMBEDDING_MAX_LENGTH: int = 256  # token limit of all-MiniLM-L6-v2; longer chunks are truncated
+    ONNX_MODEL_DIR: str = r"D:\medicare\Data\onnx_models"
+    ONNX_QUANTIZE: bool = True  # dynamic int8 weights; False runs the fp32 export
+    ONNX_INTRA_OP_THREADS: int = 0  # 0 lets ONNX Runtime use one thread per physical core
+    ONNX_INTER_OP_THREADS: int = 1
+
+    # --- Vector Store Configuration ---
+    QDRANT_PATH: str = r"D:\medicare\src\infrastructure"
+    QDRANT_COLLECTION_NAME: str = "Medicare"
+    QDRANT_URL: str = ""  # Qdrant server; empty uses the embedded store at QDRANT_PATH
+    QDRANT_API_KEY: str = ""
+    # "none", "scalar" (int8) or "binary"; the embedded store accepts but ignores quantization
+    QDRANT_QUANTIZATION: str = "none"
+    QDRANT_ORIGINALS_ON_DISK: bool = True
+    QDRANT_RESCORE: bool = True
+    QDRANT_OVERSAMPLING: float = 2.0
+    # HNSW graph (build time) and search-time ef; tune with benchmarks/tune_hnsw.py. QDRANT_HNSW_EF=0 keeps Qdrant's default
+    QDRANT_HNSW_M: int = 16
+    QDRANT_HNSW_EF_CONSTRUCT: int = 100
+    QDRANT_HNSW_EF: int = 0
+    # segments smaller than this are searched by full scan; None keeps Qdrant's default (10000 KB)
+    QDRANT_INDEXING_THRESHOLD_KB: Optional[int] = None
+    INDEX_VERSION_PATH: str = r"D:\medicare\Data\index_versions.json"
+    # "qdrant", or "flat": a memory-mapped numpy index exported from the Qdrant collection after ingestion
+    VECTOR_BACKEND: str = "qdrant"
+    FLAT_INDEX_DIR: str = r"D:\medicare\Data\flat_index"
+
+    # --- Sparse / Hybrid Retrieval Configuration ---
+    SPARSE_INDEX_PATH: str = r"D:\medicare\Data\sparse_index.sqlite"
+    # "dense" or "hybrid" (dense + BM25 fused with reciprocal rank fusion). Switch to "hybrid" once
+    # the BM25 index is built (re-run ingest); scores are then RRF values, not cosine similarity
+    RETRIEVAL_MODE: str = "dense"
+    HYBRID_CANDIDATES: int = 20
+    RRF_K: int = 60
+
+    # --- Rerank Configuration ---
+    RERANK_ENABLED: bool = False
+    RERANK_MODEL_NAME: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES: int = 20
+    RERANK_TOP_N: int = 3
+    RERANK_BATCH_SIZE: int = 32
+    RERANK_MAX_LENGTH: int = 512
+    RERANK_BUDGET_MS: float = 250.0
+
+    # --- Retrieval Cache Configuration ---
+    RETRIEVAL_CACHE_SIZE: int = 1024
+    RETRIEVAL_CACHE_TTL_SECONDS: float = 600.0
+
+    # --- Ingestion Configuration ---
+    INGEST_BATCH_SIZE: int = 64
+    INGEST_MANIFEST_PATH: str = r"D:\medicare\Data\ingest_manifest.json"
+
+    # --- Conversation Checkpoint Configuration ---
+    CHECKPOINT_DB_PATH: str = r"D:\medicare\Data\checkpoints.sqlite"
+    CHECKPOINT_MAX_PER_THREAD: int = 10
+    CHECKPOINT_TTL_SECONDS: float = 7 * 24 * 3600.0
+
+    # --- Conversation Context Configuration ---
+    CONTEXT_TOKEN_BUDGET: int = 4000
+    CONTEXT_KEEP_TURNS: int = 4
+    CONTEXT_SUMMARY_TOKENS: int = 800
+    CONTEXT_TOOL_PAYLOAD_CHARS: int = 4000
+
+    # --- Logging Configuration ---
+    LOG_DIR: str = r"D:\medicare\src\logger\logs"
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_SAMPLE_RATE: float = 1.0
 
     # --- GROQ Configuration ---
-    GROQ_API_KEY: str 
+    GROQ_API_KEY: str = ""
     GROQ_LLM_MODEL: str = "qwen/qwen3-32b"
 
+    # --- LLM Response Cache Configuration ---
+    LLM_CACHE_SIZE: int = 1024
+    # SQLite tier of the response cache; empty keeps it in memory only. It stores full
+    # prompts (patient messages, discharge reports) and answers in plaintext, so only
+    # point it at storage approved for PHI.
+    LLM_CACHE_PATH: str = ""
+
     # --- LANGCHAIN & RELATED Configuration ---
-    TAVILY_API_KEY: str 
+    TAVILY_API_KEY: str = ""
 
     # --- Comet ML & Opik Configuration ---
     COMET_API_KEY: str = Field("",description="API key for Comet ML and Opik services.")
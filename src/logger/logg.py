@@ -1,40 +1,169 @@
-import logging 
+import atexit
+import json
+import logging
+import logging.handlers
 import os
+import queue
+import random
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
 
-def logs(file_name: str, log_dir: str = r"D:\medicare\src\logger\logs"):
-    """
-    Create a logger that writes to console and a file in a specific directory.
+from src.config import settings
 
-    Args:
-        file_name (str): Name of the log file (e.g., 'app.log').
-        log_dir (str): Directory where logs should be saved. Defaults to 'logs'.
+ROOT_LOGGER = "medicare"
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and goes into the JSON record
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "log_file"}
+
+_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+_listener: Optional[logging.handlers.QueueListener] = None
+_sampler: Optional[logging.Filter] = None
+_setup_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, message, any `extra=` fields and the traceback."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("{asctime} - {levelname} - {name} - {message}", style="{", datefmt="%Y-%m-%d %H:%M:%S")
+
+
+class SamplingFilter(logging.Filter):
+    """Keep every record at or above `min_level`; keep records below it with probability `rate`."""
+
+    def __init__(self, rate: float, min_level: int = logging.WARNING):
+        super().__init__()
+        self.rate = rate
+        self.min_level = min_level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.min_level or self.rate >= 1.0 or random.random() < self.rate
+
+
+class _FileTagFilter(logging.Filter):
+    """Tag records with the log file path of the module logger they were emitted on."""
+
+    def __init__(self, file_path: Optional[str]):
+        super().__init__()
+        self.file_path = file_path
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.log_file = self.file_path
+        return True
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueue records for the background listener. Only the message arguments are
+    merged here (they may be mutable); JSON encoding and all I/O happen in the
+    listener thread, so logging never blocks the caller.
     """
-    # Ensure the directory exists
-    os.makedirs(log_dir, exist_ok=True)
 
-    # Full path to the log file
-    file_path = os.path.join(log_dir, file_name)
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
 
-    logger = logging.getLogger(__name__)
-    logger.setLevel(logging.DEBUG)
 
-    # Avoid adding handlers multiple times
-    if not logger.handlers:
-        console_handler = logging.StreamHandler()
-        file_handler = logging.FileHandler(file_path, mode="a", encoding="utf-8")
+class _FileRouter(logging.Handler):
+    """Writes each record to the file named by its `log_file` tag, opening files lazily."""
+
+    def __init__(self, formatter: logging.Formatter):
+        super().__init__()
+        self.setFormatter(formatter)
+        self._files: Dict[str, logging.FileHandler] = {}
+
+    def emit(self, record: logging.LogRecord) -> None:
+        file_path = getattr(record, "log_file", None)
+        if not file_path:
+            return
+        handler = self._files.get(file_path)
+        if handler is None:
+            os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+            handler = logging.FileHandler(file_path, mode="a", encoding="utf-8")
+            handler.setFormatter(self.formatter)
+            self._files[file_path] = handler
+        handler.emit(record)
+
+    def close(self) -> None:
+        for handler in self._files.values():
+            handler.close()
+        self._files.clear()
+        super().close()
+
+
+def _start_listener() -> None:
+    global _listener, _sampler
+    formatter = JsonFormatter() if settings.LOG_FORMAT.lower() == "json" else TextFormatter()
+
+    console = logging.StreamHandler()
+    console.setFormatter(formatter)
+
+    _listener = logging.handlers.QueueListener(_queue, console, _FileRouter(formatter), respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown)
 
-        formatter = logging.Formatter(
-            "{asctime} - {levelname} - {message}",
-            style="{",
-            datefmt="%Y-%m-%d %H:%M"
-        )
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(settings.LOG_LEVEL.upper())
+    root.propagate = False
+    _sampler = SamplingFilter(settings.LOG_SAMPLE_RATE)
 
-        console_handler.setFormatter(formatter)
-        console_handler.setLevel(logging.DEBUG)
-        file_handler.setFormatter(formatter)
-        file_handler.setLevel(logging.DEBUG)
 
-        logger.addHandler(console_handler)
-        logger.addHandler(file_handler)
+def shutdown() -> None:
+    """Flush queued records and stop the background writer."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
 
-    return logger
\ No newline at end of file
+
+def logs(file_name: str, log_dir: str = settings.LOG_DIR) -> logging.Logger:
+    """
+    Return the logger for one module, writing to `file_name` inside `log_dir` and to the console.
+
+    Every module gets its own logger ("medicare.<file stem>") whose queue handler only
+    samples and enqueues; a single background listener formats the records (JSON or
+    text, per settings.LOG_FORMAT) and does all console and file I/O. The level comes
+    from settings.LOG_LEVEL and records below WARNING are kept at settings.LOG_SAMPLE_RATE.
+
+    Args:
+        file_name (str): Name of the log file (e.g., 'app.log').
+        log_dir (str): Directory where logs should be saved; empty disables the file.
+    """
+    with _setup_lock:
+        if _listener is None:
+            _start_listener()
+
+    logger = logging.getLogger(f"{ROOT_LOGGER}.{os.path.splitext(file_name)[0]}")
+    # Avoid adding handlers multiple times
+    if not logger.handlers:
+        handler = _NonBlockingQueueHandler(_queue)
+        handler.addFilter(_sampler)
+        handler.addFilter(_FileTagFilter(os.path.join(log_dir, file_name) if log_dir else None))
+        logger.addHandler(handler)
+        logger.propagate = False
+    return logger
@@ -0,0 +1,35 @@
+from langchain_core.messages import ToolMessage
+from langchain_core.messages.base import BaseMessage
+from typing import List
+
+
+class MessageSummary:
+    """
+    PHI-free description of a message list for logs: message types, tool names and
+    sizes, never content. Rendered lazily, only when the log record is emitted.
+    """
+
+    __slots__ = ("messages", "limit")
+
+    def __init__(self, messages: List[BaseMessage], limit: int = 10):
+        self.messages = messages
+        self.limit = limit
+
+    @staticmethod
+    def describe(message: BaseMessage) -> str:
+        text = message.content if isinstance(message.content, str) else str(message.content)
+        label = message.type
+        if isinstance(message, ToolMessage):
+            label += f"({message.name})"
+        label += f":{len(text)}c"
+        tool_calls = getattr(message, "tool_calls", None)
+        if tool_calls:
+            label += "->" + ",".join(call["name"] for call in tool_calls)
+        return label
+
+    def __str__(self) -> str:
+        shown = self.messages[-self.limit:]
+        parts = [self.describe(m) for m in shown]
+        if len(self.messages) > len(shown):
+            parts.insert(0, f"+{len(self.messages) - len(shown)} earlier")
+        return f"{len(self.messages)} msgs [{', '.join(parts)}]"
@@ -0,0 +1,127 @@
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import ToolMessage
+from langchain_core.outputs import LLMResult
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+import time
+
+from .metrics import (
+    LLM_DURATION,
+    LLM_ERRORS,
+    LLM_TOKENS,
+    NODE_DURATION,
+    NODE_ERRORS,
+    TOOL_DURATION,
+    TOOL_ERRORS,
+)
+
+
+def _is_error_result(output: Any) -> bool:
+    """Our tools report failures as {"error": ...} instead of raising; count those too."""
+    if isinstance(output, ToolMessage):
+        if output.status == "error":
+            return True
+        output = output.content
+    if isinstance(output, dict):
+        return "error" in output
+    return isinstance(output, str) and output.lstrip().startswith('{"error"')
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Feeds graph node, tool and chat model timings into src.monitoring.metrics.
+
+    Pass one shared instance in the `callbacks` of every graph run. A node run is
+    the chain run whose name equals its `langgraph_node` metadata; tools are
+    labelled by tool name and chat model calls by the node they ran in plus the
+    model name, with token usage taken from the provider's usage metadata.
+    """
+
+    def __init__(self):
+        self._nodes: Dict[UUID, Tuple[str, float]] = {}
+        self._tools: Dict[UUID, Tuple[str, float]] = {}
+        self._llms: Dict[UUID, Tuple[str, str, float]] = {}
+
+    # ------------------------------------------------------------------ nodes
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self._nodes[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        entry = self._nodes.pop(run_id, None)
+        if entry is not None:
+            NODE_DURATION.observe(time.perf_counter() - entry[1], node=entry[0])
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        entry = self._nodes.pop(run_id, None)
+        if entry is not None:
+            NODE_DURATION.observe(time.perf_counter() - entry[1], node=entry[0])
+            # graph interrupts travel as exceptions but are not failures
+            if type(error).__name__ not in ("GraphInterrupt", "NodeInterrupt", "ParentCommand"):
+                NODE_ERRORS.inc(node=entry[0])
+
+    # ------------------------------------------------------------------ tools
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "unknown"
+        self._tools[run_id] = (name, time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        entry = self._tools.pop(run_id, None)
+        if entry is not None:
+            TOOL_DURATION.observe(time.perf_counter() - entry[1], tool=entry[0])
+            if _is_error_result(output):
+                TOOL_ERRORS.inc(tool=entry[0])
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        entry = self._tools.pop(run_id, None)
+        if entry is not None:
+            TOOL_DURATION.observe(time.perf_counter() - entry[1], tool=entry[0])
+            TOOL_ERRORS.inc(tool=entry[0])
+
+    # ------------------------------------------------------------------ chat models
+
+    def _start_llm(self, run_id: UUID, metadata: Optional[Dict[str, Any]], kwargs: Dict[str, Any]) -> None:
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name") or (kwargs.get("invocation_params") or {}).get("model") or "unknown"
+        self._llms[run_id] = (metadata.get("langgraph_node", "none"), str(model), time.perf_counter())
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        self._start_llm(run_id, metadata, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        self._start_llm(run_id, metadata, kwargs)
+
+    def on_llm_end(self, response: LLMResult, *, run_id, **kwargs):
+        entry = self._llms.pop(run_id, None)
+        if entry is None:
+            return
+        node, model, started = entry
+        LLM_DURATION.observe(time.perf_counter() - started, node=node, model=model)
+
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+        if not (input_tokens or output_tokens):
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            input_tokens = usage.get("prompt_tokens", 0)
+            output_tokens = usage.get("completion_tokens", 0)
+        if input_tokens:
+            LLM_TOKENS.inc(input_tokens, node=node, model=model, kind="input")
+        if output_tokens:
+            LLM_TOKENS.inc(output_tokens, node=node, model=model, kind="output")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        entry = self._llms.pop(run_id, None)
+        if entry is not None:
+            node, model, started = entry
+            LLM_DURATION.observe(time.perf_counter() - started, node=node, model=model)
+            LLM_ERRORS.inc(node=node, model=model)
+
+
+metrics_handler = MetricsCallbackHandler()